@@ -152,7 +152,7 @@ def print_and_save_data(data_to_print, start_time):
                 line = f"{label:<20} | {value:<20}"
                 print(line)
                 out_file.write(line + "\n")
-            elapsed_time = time.time() - start_time
+            elapsed_time = time.perf_counter() - start_time
             print(f"Elapsed Time: {elapsed_time:.4f} seconds")
             out_file.write(f"Elapsed Time: {elapsed_time:.4f} seconds")
     except IOError as e:
@@ -161,7 +161,7 @@ def print_and_save_data(data_to_print, start_time):
 
 def main():
     """Main execution function."""
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     if len(sys.argv) < 2:
         print("Error format: python computeStatistics.py <fileWithData.txt>")
@@ -88,7 +88,7 @@ def convert_number(int_num):
 
 def main():
     """Main execution function for the number converter."""
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     if len(sys.argv) < 2:
         print("Error use command: python convertNumbers.py <fileWithData.txt>")
@@ -133,7 +133,7 @@ def main():
                         out_file.write(row + "\n")
                         index += 1
 
-            end_time = time.time()
+            end_time = time.perf_counter()
             elapsed_time = end_time - start_time
 
             print(f"Elapsed Time: {elapsed_time:.4f} seconds")
@@ -108,7 +108,7 @@ def write_output(word_freq, start_time, total):
                 out_file.write(line + "\n")
             out_file.write(f"Grand Total: {total}\n")
             print(f"Grand Total: {total}")
-            end_time = time.time()
+            end_time = time.perf_counter()
             elapsed_time = end_time - start_time
 
             print(f"Elapsed Time: {elapsed_time:.4f} seconds")
@@ -120,7 +120,7 @@ def write_output(word_freq, start_time, total):
 
 def main():
     """Main execution function for the word counter."""
-    start_time = time.time()
+    start_time = time.perf_counter()
 
     if len(sys.argv) < 2:
         print("Error use command: python wordCount.py <fileWithData.txt>")
@@ -5,10 +5,16 @@ Program that takes the JSON of a product catalogue and sales
 and sales record, and calculates the total sales to show the
 user.
 """
+import hashlib
 import json
+import multiprocessing
+import os
 import sys
 import time
 
+# Catalogue index shared with each batch worker by _init_batch_worker
+_BATCH_STATE = {}
+
 
 def process_json(file_path):
     """
@@ -28,12 +34,32 @@ def process_json(file_path):
         return None
 
 
-def calculate_total_sales(catalogue, sales):
+def build_catalogue_index(catalogue):
     """
-    Computes total sales and handles missing items.
+    Builds the price lookup dictionary from the product catalogue.
 
     Args:
-        file_path (str): File path to the JSON to load.
+        catalogue (list): List of products loaded from the catalogue JSON.
+
+    Returns:
+        catalogue_dict (dict): Dictionary with the price of each title.
+    """
+    catalogue_dict = {}
+    for item in catalogue:
+        catalogue_dict[item["title"]] = item["price"]
+    return catalogue_dict
+
+
+def price_sales(catalogue_dict, sales, resolver=None):
+    """
+    Computes total sales against an already built catalogue index.
+
+    Args:
+        catalogue_dict (dict): Price lookup built by build_catalogue_index.
+        sales (list): List of sales loaded from the sales JSON.
+        resolver (ProductResolver): Optional resolver for unmatched
+            products. Resolved sales are kept by the resolver and are not
+            added to the total or counted as errors.
 
     Returns:
         total_cost (float): total cost of all the sales in the JSON.
@@ -41,10 +67,6 @@ def calculate_total_sales(catalogue, sales):
     """
     total_cost = 0.0
     errors = 0
-    catalogue_dict = {}
-    # Create a dictionary with prices for each items for lookup
-    for item in catalogue:
-        catalogue_dict[item["title"]] = item["price"]
 
     # Use .get to access the dictionary to have a None or 0 in case the
     # key does not exist in the given dictionary
@@ -55,6 +77,9 @@ def calculate_total_sales(catalogue, sales):
 
         if (price is not None) and (quantity != 0):
             total_cost += price * quantity
+        elif (price is None and quantity != 0 and resolver is not None
+              and resolver.record_sale(sale, product, quantity)):
+            continue
         else:
             sale_id = sale.get("SALE_ID")
             print(f"Error in SALE {sale_id} with product '{product}'")
@@ -63,17 +88,457 @@ def calculate_total_sales(catalogue, sales):
     return total_cost, errors
 
 
+def calculate_total_sales(catalogue, sales):
+    """
+    Computes total sales and handles missing items.
+
+    Args:
+        catalogue (list): List of products loaded from the catalogue JSON.
+        sales (list): List of sales loaded from the sales JSON.
+
+    Returns:
+        total_cost (float): total cost of all the sales in the JSON.
+        errors (int): total errors found in the JSON.
+    """
+    # Create a dictionary with prices for each items for lookup
+    return price_sales(build_catalogue_index(catalogue), sales)
+
+
+class ProductResolver:
+    """
+    Resolves product names missing from the catalogue to their closest
+    catalogue title. Titles are indexed by character trigrams in an
+    inverted index, so only the titles sharing a trigram with the unknown
+    name are scored instead of comparing it against the whole catalogue.
+    """
+
+    def __init__(self, catalogue_dict, min_confidence=0.6):
+        """
+        Args:
+            catalogue_dict (dict): Price lookup built by
+                build_catalogue_index.
+            min_confidence (float): Lowest Dice score accepted as a match.
+        """
+        self.catalogue_dict = catalogue_dict
+        self.min_confidence = min_confidence
+        self.title_grams = {}
+        self.postings = {}
+        self.resolutions = {}
+        self.resolved_sales = []
+        self.resolved_total = 0.0
+        for title in catalogue_dict:
+            grams = self.trigrams(title)
+            self.title_grams[title] = len(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(title)
+
+    @staticmethod
+    def trigrams(name):
+        """Returns the set of character trigrams of a normalized name."""
+        padded = f"  {' '.join(str(name).lower().split())} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def resolve(self, product):
+        """
+        Finds the best catalogue title for an unknown product. Results are
+        memoized per distinct product name.
+
+        Returns:
+            (tuple): (title, confidence) or None if no title scores at
+                     least min_confidence, or the product is not a name.
+        """
+        # A sale without a product name is invalid, not a typo
+        if not isinstance(product, str) or not product.strip():
+            return None
+        if product in self.resolutions:
+            return self.resolutions[product]
+
+        grams = self.trigrams(product)
+        shared = {}
+        for gram in grams:
+            for title in self.postings.get(gram, ()):
+                shared[title] = shared.get(title, 0) + 1
+
+        best = None
+        for title, count in shared.items():
+            # Dice coefficient over the trigram sets
+            score = 2 * count / (len(grams) + self.title_grams[title])
+            if score >= self.min_confidence and (
+                    best is None or score > best[1]):
+                best = (title, score)
+
+        self.resolutions[product] = best
+        return best
+
+    def record_sale(self, sale, product, quantity):
+        """
+        Prices a sale with an unknown product through its resolution.
+
+        Returns:
+            (bool): True if the product was resolved and the sale recorded.
+        """
+        resolution = self.resolve(product)
+        if resolution is None:
+            return False
+        title, confidence = resolution
+        cost = self.catalogue_dict[title] * quantity
+        self.resolved_total += cost
+        self.resolved_sales.append(
+            (sale.get("SALE_ID"), product, title, confidence, cost))
+        return True
+
+    def report_lines(self):
+        """Returns the report lines describing the resolved sales."""
+        output = []
+        output.append(f"Resolved Sales Cost: ${self.resolved_total:,.2f}")
+        for sale_id, product, title, confidence, cost in self.resolved_sales:
+            output.append(f"SALE {sale_id}: '{product}' -> '{title}' "
+                          f"(confidence {confidence:.2f}) ${cost:,.2f}")
+        return output
+
+
+def _init_batch_worker(catalogue_dict):
+    """Stores the shared catalogue index in the worker process."""
+    _BATCH_STATE["catalogue"] = catalogue_dict
+
+
+def _price_sales_file(sales_file):
+    """
+    Prices a single sales file inside a batch worker.
+
+    Returns:
+        (tuple): Sales file, total cost (None if it could not be
+                 loaded) and errors found.
+    """
+    sales_data = process_json(sales_file)
+    if sales_data is None:
+        return sales_file, None, 0
+    total, errors = price_sales(_BATCH_STATE["catalogue"], sales_data)
+    return sales_file, total, errors
+
+
+def run_batch(catalogue_file, sales_files, workers=None):
+    """
+    Prices many sales files against the same catalogue. The catalogue is
+    loaded and indexed once and handed to each worker of the pool when it
+    starts, so the files are processed concurrently without re-parsing it.
+
+    Args:
+        catalogue_file (str): File path to the catalogue JSON.
+        sales_files (list): File paths to the sales JSONs.
+        workers (int): Number of worker processes, defaults to the CPUs.
+
+    Returns:
+        (list): Tuples of (sales file, total, errors) in the given order,
+                or None if the catalogue could not be loaded.
+    """
+    catalogue_data = process_json(catalogue_file)
+    if catalogue_data is None:
+        return None
+    catalogue_dict = build_catalogue_index(catalogue_data)
+
+    with multiprocessing.Pool(processes=workers,
+                              initializer=_init_batch_worker,
+                              initargs=(catalogue_dict,)) as pool:
+        return pool.map(_price_sales_file, sales_files)
+
+
+def format_batch_report(results, elapsed_time):
+    """
+    Builds the batch report with the totals per file and the grand total.
+
+    Args:
+        results (list): Tuples returned by run_batch.
+        elapsed_time (float): Time spent running the batch.
+
+    Returns:
+        (str): Report ready to print and save.
+    """
+    grand_total = 0.0
+    grand_errors = 0
+    output = []
+    output.append("-" * 30)
+    output.append("SALES BATCH EXECUTION RESULTS")
+    output.append("-" * 30)
+    for sales_file, total, errors in results:
+        if total is None:
+            output.append(f"{sales_file}: could not be loaded")
+            continue
+        grand_total += total
+        grand_errors += errors
+        output.append(f"{sales_file}: ${total:,.2f} ({errors} errors)")
+    output.append("-" * 30)
+    output.append(f"Grand Total Sales Cost: ${grand_total:,.2f}")
+    output.append(f"Files processed: {len(results)}")
+    output.append(f"Execution Time: {elapsed_time:.4f} seconds")
+    output.append("-" * 30)
+    if grand_errors:
+        output.append(f"Errors encountered: {grand_errors}")
+    return "\n".join(output)
+
+
+def main_batch(args, start_time):
+    """
+    Batch execution: --batch [--workers N] catalogue.json sales.json ...
+    """
+    workers = None
+    if len(args) >= 2 and args[0] == "--workers":
+        try:
+            workers = int(args[1])
+        except ValueError:
+            workers = 0
+        if workers < 1:
+            print(f"Error: Invalid number of workers '{args[1]}', "
+                  "use 1 or more")
+            return
+        args = args[2:]
+
+    if len(args) < 2:
+        print("Error use command: python computeSales.py --batch "
+              "[--workers N] priceCatalogue.json salesRecord.json ...")
+        return
+
+    results = run_batch(args[0], args[1:], workers)
+    if results is None:
+        return
+
+    final_result = format_batch_report(results,
+                                       time.perf_counter() - start_time)
+    print(final_result)
+    with open("SalesResults.txt", "w", encoding="utf-8") as f:
+        f.write(final_result)
+
+
+def file_digest(file_path):
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def update_digest(digest, file_path, start, end):
+    """Adds the bytes of a file between two offsets to a digest."""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(1 << 16, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest
+
+
+def _skip_whitespace(text, position):
+    """Returns the first position at or after position with no blank."""
+    while position < len(text) and text[position] in " \t\r\n":
+        position += 1
+    return position
+
+
+def read_sales_from(file_path, offset):
+    """
+    Parses the sales records of a JSON array starting at a byte offset,
+    so a file that keeps growing only has its new records decoded.
+
+    Args:
+        file_path (str): File path to the sales JSON.
+        offset (int): Byte offset right after the last processed record,
+                      0 to read the whole array.
+
+    Returns:
+        sales (list): Records found after the offset.
+        new_offset (int): Byte offset right after the last record read.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        raw = f.read()
+    text = raw.decode('utf-8')
+    sales = []
+    position = 0
+    consumed = 0
+    expected = "[" if offset == 0 else ","
+    while True:
+        position = _skip_whitespace(text, position)
+        if position >= len(text) or text[position] == "]":
+            break
+        if text[position] != expected:
+            raise json.JSONDecodeError(f"Expecting '{expected}'",
+                                       text, position)
+        position = _skip_whitespace(text, position + 1)
+        if expected == "[" and text.startswith("]", position):
+            # Empty array, read again from the start once it grows
+            break
+        sale, position = decoder.raw_decode(text, position)
+        sales.append(sale)
+        consumed = position
+        expected = ","
+    return sales, offset + len(text[:consumed].encode('utf-8'))
+
+
+def load_ledger(ledger_file):
+    """Loads the ledger checkpoint, returns None if there is none."""
+    if not os.path.exists(ledger_file):
+        return None
+    return process_json(ledger_file)
+
+
+def ledger_is_valid(ledger, catalogue_digest, sales_file, digest):
+    """
+    Checks a checkpoint can be resumed: same catalogue content, same sales
+    file and the already processed bytes were not rewritten, comparing
+    their SHA-256 digest with the one in the ledger.
+
+    Args:
+        digest (hashlib object): Updated with the processed bytes, to be
+            extended with the new ones for the next checkpoint.
+    """
+    # Valid JSON that is not a checkpoint, like an array, is not resumed
+    if not isinstance(ledger, dict) or \
+            ledger.get("catalogue_digest") != catalogue_digest:
+        return False
+    if ledger.get("sales_file") != os.path.abspath(sales_file):
+        return False
+    offset = ledger.get("offset", 0)
+    if not isinstance(offset, int) or offset < 0:
+        return False
+    try:
+        if os.path.getsize(sales_file) < offset:
+            return False
+        update_digest(digest, sales_file, 0, offset)
+    except OSError:
+        return False
+    return digest.hexdigest() == ledger.get("prefix_digest")
+
+
+def run_ledger(catalogue_file, sales_file, ledger_file):
+    """
+    Incrementally prices a growing sales file. The running total, error
+    count and byte offset of the last processed record are persisted in
+    the ledger, so reruns only parse and price the new records. If the
+    catalogue changed since the checkpoint everything is recomputed.
+
+    Returns:
+        (tuple): (total, errors, total records, new records) or None if
+                 the files could not be processed.
+    """
+    catalogue_data = process_json(catalogue_file)
+    if catalogue_data is None:
+        return None
+    if not os.path.isfile(sales_file):
+        print(f"Error: Sales file {sales_file} not found")
+        return None
+    catalogue_digest = file_digest(catalogue_file)
+
+    ledger = load_ledger(ledger_file)
+    digest = hashlib.sha256()
+    if not ledger_is_valid(ledger, catalogue_digest, sales_file, digest):
+        if ledger:
+            print("Ledger out of date, recomputing from the first record")
+        ledger = {"offset": 0, "records": 0, "total": 0.0, "errors": 0}
+        digest = hashlib.sha256()
+
+    try:
+        sales_data, new_offset = read_sales_from(sales_file,
+                                                 ledger["offset"])
+    except (FileNotFoundError, json.JSONDecodeError,
+            UnicodeDecodeError) as e:
+        print(f"Error {e} in file {sales_file}")
+        return None
+
+    total, errors = price_sales(build_catalogue_index(catalogue_data),
+                                sales_data)
+    update_digest(digest, sales_file, ledger["offset"], new_offset)
+
+    ledger = {
+        "catalogue_digest": catalogue_digest,
+        "sales_file": os.path.abspath(sales_file),
+        "offset": new_offset,
+        "prefix_digest": digest.hexdigest(),
+        "records": ledger["records"] + len(sales_data),
+        "total": ledger["total"] + total,
+        "errors": ledger["errors"] + errors,
+    }
+    # Written to a temporary file first and moved over the old one, so a
+    # crash never leaves a truncated checkpoint
+    temp_file = f"{ledger_file}.tmp"
+    try:
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(ledger, f, indent=4)
+        os.replace(temp_file, ledger_file)
+    except BaseException:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+    return (ledger["total"], ledger["errors"], ledger["records"],
+            len(sales_data))
+
+
+def main_ledger(args, start_time):
+    """
+    Ledger execution: --ledger ledger.json catalogue.json sales.json
+    """
+    if len(args) != 3:
+        print("Error use command: python computeSales.py --ledger "
+              "ledger.json priceCatalogue.json salesRecord.json")
+        return
+
+    result = run_ledger(args[1], args[2], args[0])
+    if result is None:
+        return
+    total, errors, records, new_records = result
+
+    output = []
+    output.append("-" * 30)
+    output.append("SALES LEDGER EXECUTION RESULTS")
+    output.append("-" * 30)
+    output.append(f"Total Sales Cost: ${total:,.2f}")
+    output.append(f"Records: {records} ({new_records} new)")
+    elapsed_time = time.perf_counter() - start_time
+    output.append(f"Execution Time: {elapsed_time:.4f} seconds")
+    output.append("-" * 30)
+    if errors:
+        output.append(f"Errors encountered: {errors}")
+
+    final_result = "\n".join(output)
+    print(final_result)
+    with open("SalesResults.txt", "w", encoding="utf-8") as f:
+        f.write(final_result)
+
+
 def main():
     """Main execution function."""
-    start_time = time.time()
+    start_time = time.perf_counter()
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        main_batch(sys.argv[2:], start_time)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "--ledger":
+        main_ledger(sys.argv[2:], start_time)
+        return
+
+    args = sys.argv[1:]
+    resolve = False
+    if args and args[0] == "--resolve":
+        resolve = True
+        args = args[1:]
 
-    if len(sys.argv) != 3:
-        print("Error use command: python computeSales.py "
+    if len(args) != 2:
+        print("Error use command: python computeSales.py [--resolve] "
               "priceCatalogue.json salesRecord.json")
+        print("Batch use command: python computeSales.py --batch "
+              "[--workers N] priceCatalogue.json salesRecord.json ...")
+        print("Ledger use command: python computeSales.py --ledger "
+              "ledger.json priceCatalogue.json salesRecord.json")
         return
 
-    catalogue_file = sys.argv[1]
-    sales_file = sys.argv[2]
+    catalogue_file = args[0]
+    sales_file = args[1]
 
     # Load data
     catalogue_data = process_json(catalogue_file)
@@ -83,9 +548,11 @@ def main():
         return
 
     # Process data
-    total, errors = calculate_total_sales(catalogue_data, sales_data)
+    catalogue_dict = build_catalogue_index(catalogue_data)
+    resolver = ProductResolver(catalogue_dict) if resolve else None
+    total, errors = price_sales(catalogue_dict, sales_data, resolver)
 
-    end_time = time.time()
+    end_time = time.perf_counter()
     elapsed_time = end_time - start_time
 
     # Prepare output
@@ -98,6 +565,9 @@ def main():
     output.append("-" * 30)
     if errors:
         output.append(f"Errors encountered: {errors}")
+    if resolver is not None and resolver.resolved_sales:
+        output.extend(resolver.report_lines())
+        output.append("-" * 30)
 
     final_result = "\n".join(output)
 
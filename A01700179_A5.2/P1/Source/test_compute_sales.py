@@ -0,0 +1,229 @@
+"""
+Unit tests for the product resolver, the batch mode and the ledger mode
+of computeSales.
+"""
+
+import unittest
+import io
+import json
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
+import computeSales
+
+CATALOGUE = [{"title": "Eggs", "price": 2.5}, {"title": "Milk", "price": 1.0}]
+
+
+class TestProductResolver(unittest.TestCase):
+    """Test suite for the resolution of products missing a price."""
+
+    def setUp(self):
+        """Creates a resolver for a small catalogue."""
+        self.catalogue = {"Sweet fresh stawberry": 4.0, "Eggs": 2.5,
+                          "Milk": 1.0}
+        self.resolver = computeSales.ProductResolver(self.catalogue)
+
+    def test_close_name(self):
+        """Test a name missing a word resolves to the catalogue title"""
+        title, confidence = self.resolver.resolve("Fresh stawberry")
+        self.assertEqual(title, "Sweet fresh stawberry")
+        self.assertGreaterEqual(confidence, self.resolver.min_confidence)
+
+    def test_below_min_confidence(self):
+        """Test a name scoring below min_confidence is not resolved"""
+        self.assertIsNone(self.resolver.resolve("Mik"))
+        lenient = computeSales.ProductResolver(self.catalogue,
+                                               min_confidence=0.3)
+        self.assertEqual(lenient.resolve("Mik")[0], "Milk")
+
+    def test_memoized_repeat(self):
+        """Test a name already resolved is not scored again"""
+        first = self.resolver.resolve("Fresh stawberry")
+        with mock.patch.object(self.resolver, "trigrams") as trigrams:
+            self.assertEqual(self.resolver.resolve("Fresh stawberry"),
+                             first)
+        trigrams.assert_not_called()
+
+    def test_not_a_name(self):
+        """Test products that are not names are never resolved"""
+        for product in (None, 5, "", "   ", ["Eggs"]):
+            self.assertIsNone(self.resolver.resolve(product))
+        self.assertEqual(self.resolver.resolutions, {})
+
+    def test_resolved_sales_are_kept_apart(self):
+        """Test resolved sales are neither errors nor in the total"""
+        sales = [{"SALE_ID": 1, "Product": "Eggs", "Quantity": 2},
+                 {"SALE_ID": 2, "Product": "Fresh stawberry", "Quantity": 1},
+                 {"SALE_ID": 3, "Product": "Bread", "Quantity": 1},
+                 {"SALE_ID": 4, "Quantity": 1}]
+        with redirect_stdout(io.StringIO()) as console:
+            total, errors = computeSales.price_sales(self.catalogue, sales,
+                                                     self.resolver)
+
+        self.assertEqual((total, errors), (5.0, 2))
+        self.assertNotIn("SALE 2", console.getvalue())
+        self.assertEqual(self.resolver.resolved_total, 4.0)
+        lines = self.resolver.report_lines()
+        self.assertEqual(lines[0], "Resolved Sales Cost: $4.00")
+        self.assertIn("SALE 2: 'Fresh stawberry' -> 'Sweet fresh stawberry'",
+                      lines[1])
+
+
+class TestBatch(unittest.TestCase):
+    """Test suite for pricing many sales files at once."""
+
+    def setUp(self):
+        """Creates the catalogue and two sales files."""
+        self.folder = tempfile.mkdtemp()
+        self.catalogue = os.path.join(self.folder, "catalogue.json")
+        self.sales = [os.path.join(self.folder, f"sales{number}.json")
+                      for number in (1, 2)]
+        with open(self.catalogue, "w", encoding="utf-8") as file:
+            json.dump(CATALOGUE, file)
+        for path, sales in zip(self.sales, (
+                [{"SALE_ID": 1, "Product": "Eggs", "Quantity": 2}],
+                [{"SALE_ID": 1, "Product": "Milk", "Quantity": 3},
+                 {"SALE_ID": 2, "Product": "Bread", "Quantity": 1}])):
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(sales, file)
+
+    def tearDown(self):
+        """Removes the temporary folder."""
+        shutil.rmtree(self.folder)
+
+    def test_totals_per_file(self):
+        """Test each file gets its own total and the report adds them"""
+        with redirect_stdout(io.StringIO()):
+            results = computeSales.run_batch(self.catalogue, self.sales, 2)
+        self.assertEqual(results, [(self.sales[0], 5.0, 0),
+                                   (self.sales[1], 3.0, 1)])
+
+        report = computeSales.format_batch_report(results, 0.1)
+        self.assertIn(f"{self.sales[0]}: $5.00 (0 errors)", report)
+        self.assertIn(f"{self.sales[1]}: $3.00 (1 errors)", report)
+        self.assertIn("Grand Total Sales Cost: $8.00", report)
+        self.assertIn("Errors encountered: 1", report)
+
+    def test_unloadable_file(self):
+        """Test a sales file that cannot be loaded is reported apart"""
+        missing = os.path.join(self.folder, "missing.json")
+        with redirect_stdout(io.StringIO()):
+            results = computeSales.run_batch(
+                self.catalogue, [self.sales[0], missing], 1)
+
+        report = computeSales.format_batch_report(results, 0.1)
+        self.assertIn(f"{missing}: could not be loaded", report)
+        self.assertIn("Grand Total Sales Cost: $5.00", report)
+
+    def test_invalid_workers(self):
+        """Test a worker count below one or not a number is rejected"""
+        for workers in ("0", "-2", "many"):
+            with redirect_stdout(io.StringIO()) as console, \
+                    mock.patch.object(computeSales, "run_batch") as run:
+                computeSales.main_batch(
+                    ["--workers", workers, self.catalogue] + self.sales, 0)
+            run.assert_not_called()
+            self.assertIn(f"Invalid number of workers '{workers}'",
+                          console.getvalue())
+
+
+class TestLedger(unittest.TestCase):
+    """Test suite for the incremental pricing of a growing sales file."""
+
+    def setUp(self):
+        """Creates the catalogue in a temporary folder."""
+        self.folder = tempfile.mkdtemp()
+        self.catalogue = os.path.join(self.folder, "catalogue.json")
+        self.sales = os.path.join(self.folder, "sales.json")
+        self.ledger = os.path.join(self.folder, "ledger.json")
+        with open(self.catalogue, "w", encoding="utf-8") as file:
+            json.dump(CATALOGUE, file)
+
+    def tearDown(self):
+        """Removes the temporary folder."""
+        shutil.rmtree(self.folder)
+
+    def write_sales(self, sales):
+        """Writes the sales one per line, as a file that keeps growing."""
+        with open(self.sales, "w", encoding="utf-8") as file:
+            file.write("[" + ",".join(
+                "\n  " + json.dumps(sale) for sale in sales) + "\n]\n")
+
+    def run_ledger(self):
+        """Runs the ledger, returning its result and console output."""
+        console = io.StringIO()
+        with redirect_stdout(console):
+            result = computeSales.run_ledger(self.catalogue, self.sales,
+                                             self.ledger)
+        return result, console.getvalue()
+
+    def test_appended_records_only(self):
+        """Test a rerun only prices the records appended since the last"""
+        sales = [{"SALE_ID": 1, "Product": "Eggs", "Quantity": 2}]
+        self.write_sales(sales)
+        self.assertEqual(self.run_ledger()[0], (5.0, 0, 1, 1))
+
+        sales.append({"SALE_ID": 2, "Product": "Milk", "Quantity": 3})
+        self.write_sales(sales)
+        self.assertEqual(self.run_ledger()[0], (8.0, 0, 2, 1))
+        self.assertEqual(self.run_ledger()[0], (8.0, 0, 2, 0))
+
+    def test_rewritten_records_are_recomputed(self):
+        """Test an edit before the processed offset recomputes the total"""
+        sales = [{"SALE_ID": number, "Product": "Milk", "Quantity": 1}
+                 for number in range(1, 20)]
+        self.write_sales(sales)
+        self.assertEqual(self.run_ledger()[0], (19.0, 0, 19, 19))
+
+        sales[0]["Quantity"] = 9
+        self.write_sales(sales)
+        result, console = self.run_ledger()
+        self.assertEqual(result, (27.0, 0, 19, 19))
+        self.assertIn("Ledger out of date", console)
+
+    def test_empty_sales_file(self):
+        """Test an empty array has no records and is read again later"""
+        self.write_sales([])
+        self.assertEqual(self.run_ledger()[0], (0.0, 0, 0, 0))
+
+        self.write_sales([{"SALE_ID": 1, "Product": "Eggs", "Quantity": 1}])
+        self.assertEqual(self.run_ledger()[0], (2.5, 0, 1, 1))
+
+    def test_missing_sales_file(self):
+        """Test a missing sales file is reported without a traceback"""
+        self.write_sales([{"SALE_ID": 1, "Product": "Eggs", "Quantity": 1}])
+        self.run_ledger()
+        os.remove(self.sales)
+
+        result, console = self.run_ledger()
+        self.assertIsNone(result)
+        self.assertIn("not found", console)
+
+    def test_ledger_that_is_not_a_checkpoint(self):
+        """Test a ledger with other JSON is recomputed, not resumed"""
+        self.write_sales([{"SALE_ID": 1, "Product": "Eggs", "Quantity": 2}])
+        for content in ([1, 2], "ledger", {"offset": "5"}):
+            with open(self.ledger, "w", encoding="utf-8") as file:
+                json.dump(content, file)
+            self.assertEqual(self.run_ledger()[0], (5.0, 0, 1, 1))
+        self.assertCountEqual(os.listdir(self.folder),
+                              ["catalogue.json", "sales.json",
+                               "ledger.json"])
+
+    def test_offset_resumption(self):
+        """Test reading from an offset returns only the later records"""
+        self.write_sales([{"SALE_ID": 1}, {"SALE_ID": 2}])
+        first, offset = computeSales.read_sales_from(self.sales, 0)
+        with open(self.sales, "rb") as file:
+            self.assertEqual(file.read()[offset:], b"\n]\n")
+
+        self.write_sales([{"SALE_ID": 1}, {"SALE_ID": 2}, {"SALE_ID": 3}])
+        later, _ = computeSales.read_sales_from(self.sales, offset)
+        self.assertEqual(first + later,
+                         [{"SALE_ID": 1}, {"SALE_ID": 2}, {"SALE_ID": 3}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Module to implement the room availability by date of the Hotel System.
+The rooms booked each night are kept in a segment tree, so checking and
+booking a stay of any length takes O(log D) steps for D possible nights.
+@author: Carlos Heinze A01700179
+"""
+from datetime import date
+from typing import Dict, List, Optional, Tuple, Union
+
+DateLike = Union[str, date]
+
+
+def parse_stay(check_in: DateLike,
+               check_out: DateLike) -> Optional[Tuple[int, int]]:
+    """
+    Converts the dates of a stay to the nights it covers.
+
+    Parameters:
+        check_in (str or date): First night, as 'YYYY-MM-DD' or a date.
+        check_out (str or date): Day of departure, not a night of the stay.
+
+    Returns:
+        (Tuple): The first night and the night after the last one as day
+                 numbers, None if the dates are invalid.
+    """
+    try:
+        if isinstance(check_in, str):
+            check_in = date.fromisoformat(check_in)
+        if isinstance(check_out, str):
+            check_out = date.fromisoformat(check_out)
+        first, last = check_in.toordinal(), check_out.toordinal()
+    except (AttributeError, ValueError) as error:
+        print(f"Error: Invalid stay dates '{check_in}' - '{check_out}': "
+              f"{error}")
+        return None
+    if first >= last:
+        print(f"Error: Check-out '{check_out}' must be after check-in "
+              f"'{check_in}'.")
+        return None
+    if last > NightlyBookings.NIGHTS:
+        print(f"Error: Check-out '{check_out}' is out of range.")
+        return None
+    return first, last
+
+
+class NightlyBookings:
+    """
+    Segment tree with the number of rooms booked each night, stored in a
+    dictionary that can be saved in the hotel record. Each node keeps the
+    rooms added to its whole range and the maximum booked in the range.
+    Only the nodes touched by a booking exist, the rest are zero.
+    """
+
+    # Nights covered, day numbers as returned by date.toordinal()
+    NIGHTS = 1 << 20
+
+    def __init__(self, nodes: Optional[Dict[str, List[int]]] = None):
+        """
+        Parameters:
+            nodes (Dict): Nodes saved from a previous tree, keyed by their
+                          position as a string to be stored in JSON.
+        """
+        self.nodes = {} if nodes is None else nodes
+
+    def _node(self, position: int) -> List[int]:
+        """Returns [maximum, added] of a node, zeros if it is empty."""
+        return self.nodes.get(str(position), [0, 0])
+
+    def peak(self) -> int:
+        """Returns the most rooms booked on any night."""
+        return self._node(1)[0]
+
+    def max_booked(self, first: int, last: int) -> int:
+        """Returns the most rooms booked on a night in [first, last)."""
+        return self._query(1, 0, self.NIGHTS, first, last)
+
+    def _query(self, position: int, low: int, high: int,
+               first: int, last: int) -> int:
+        maximum, added = self._node(position)
+        if first <= low and high <= last:
+            return maximum
+        middle = (low + high) // 2
+        results = []
+        if first < middle:
+            results.append(self._query(2 * position, low, middle,
+                                       first, last))
+        if middle < last:
+            results.append(self._query(2 * position + 1, middle, high,
+                                       first, last))
+        return added + max(results)
+
+    def book(self, first: int, last: int, rooms: int = 1) -> None:
+        """Adds rooms to every night in [first, last), negative to free."""
+        self._update(1, 0, self.NIGHTS, first, last, rooms)
+
+    def _update(self, position: int, low: int, high: int,
+                first: int, last: int, rooms: int) -> None:
+        maximum, added = self._node(position)
+        if first <= low and high <= last:
+            self._set(position, maximum + rooms, added + rooms)
+            return
+        middle = (low + high) // 2
+        if first < middle:
+            self._update(2 * position, low, middle, first, last, rooms)
+        if middle < last:
+            self._update(2 * position + 1, middle, high, first, last, rooms)
+        children = max(self._node(2 * position)[0],
+                       self._node(2 * position + 1)[0])
+        self._set(position, added + children, added)
+
+    def _set(self, position: int, maximum: int, added: int) -> None:
+        """Saves a node, dropping it when it goes back to zero."""
+        if maximum == 0 and added == 0:
+            self.nodes.pop(str(position), None)
+        else:
+            self.nodes[str(position)] = [maximum, added]
+
+
+def stay_dates(stay: Tuple[int, int]) -> Tuple[str, str]:
+    """Returns the check-in and check-out of a stay as 'YYYY-MM-DD'."""
+    return (date.fromordinal(stay[0]).isoformat(),
+            date.fromordinal(stay[1]).isoformat())
+
+
+def booked_peak(hotel: Dict) -> int:
+    """Returns the most rooms of a hotel record booked on any night."""
+    return NightlyBookings(hotel.get("bookings")).peak()
+
+
+def public_view(hotel: Dict) -> Dict:
+    """Returns a hotel record without its bookings tree, for display."""
+    return {field: value for field, value in hotel.items()
+            if field != "bookings"}
+
+
+def has_rooms(hotel: Dict, stay: Optional[Tuple[int, int]],
+              rooms: int = 1) -> bool:
+    """
+    Checks if a hotel record has the rooms available, for good when there
+    is no stay or on each night of the stay. A room taken for good must
+    also be free on the busiest night already booked.
+    """
+    if stay is None:
+        return hotel["rooms"] - booked_peak(hotel) >= rooms
+    bookings = NightlyBookings(hotel.get("bookings"))
+    return bookings.max_booked(*stay) + rooms <= hotel["rooms"]
+
+
+def take_rooms(hotel: Dict, stay: Optional[Tuple[int, int]],
+               rooms: int = 1) -> bool:
+    """
+    Takes rooms from a hotel record. Without a stay the rooms are taken
+    from the available rooms for good, with one they are booked on each
+    night of the stay if that many are free on all of them.
+
+    Returns:
+        (bool): True if the rooms were taken.
+    """
+    if not has_rooms(hotel, stay, rooms):
+        return False
+    if stay is None:
+        hotel["rooms"] -= rooms
+        return True
+    bookings = NightlyBookings(hotel.get("bookings"))
+    bookings.book(*stay, rooms)
+    hotel["bookings"] = bookings.nodes
+    return True
+
+
+def release_rooms(hotel: Dict, stay: Optional[Tuple[int, int]],
+                  rooms: int = 1) -> None:
+    """Gives back to a hotel record the rooms taken by take_rooms."""
+    if stay is None:
+        hotel["rooms"] += rooms
+        return
+    bookings = NightlyBookings(hotel.get("bookings"))
+    bookings.book(*stay, -rooms)
+    if bookings.nodes:
+        hotel["bookings"] = bookings.nodes
+    else:
+        hotel.pop("bookings", None)
@@ -4,9 +4,44 @@ classes to be implemented by the Hotel System
 @author: Carlos Heinze A01700179
 """
 import os
+import copy
 import json
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import (Dict, Any, Callable, Iterable, Iterator, List,
+                    Optional, Tuple, Type)
+from secondary_index import SecondaryIndex
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_file(file) -> None:
+    """Blocks until the process holds an exclusive lock on the file."""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def unlock_file(file) -> None:
+    """Releases the lock taken by lock_file."""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 class BaseClass(ABC):
@@ -14,8 +49,41 @@ class BaseClass(ABC):
     Abstract Base Class that allows the classes in the Hotel System to
     inherit and save information to persistent JSON files simulating
     a Data Base that would be used in a real scenario.
+
+    Optionally the decoded data can be kept in a write-back cache (see
+    enable_cache), so consecutive operations do not re-read and re-write
+    the whole file each time.
+
+    Changes to a single record are optimistic: the record is read with
+    its version, changed, and only saved if the version did not change in
+    the meantime, retrying with a random backoff otherwise. This keeps
+    several processes working on the same files from losing updates.
     """
 
+    # Attempts of an optimistic update before giving up
+    max_retries = 50
+    # Base and maximum seconds waited between attempts
+    retry_backoff = 0.001
+    retry_backoff_cap = 0.1
+    # Indentation of the saved JSON, None writes it minified
+    indent: Optional[int] = 4
+    # Encoder of the saved JSON, for records that are not dictionaries
+    json_encoder: Optional[Type[json.JSONEncoder]] = None
+
+    def __init__(self) -> None:
+        self.cache_enabled = False
+        self.flush_interval: Optional[float] = None
+        self.flush_every: Optional[int] = None
+        self._cache: Optional[Dict[str, Any]] = None
+        self._cache_stamp: Optional[Tuple[int, ...]] = None
+        self._dirty = False
+        self._pending_ops = 0
+        self._last_flush = time.monotonic()
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_handle = None
+        self._index: Optional[SecondaryIndex] = None
+
     @abstractmethod
     def get_filename(self) -> str:
         """
@@ -24,29 +92,430 @@ class BaseClass(ABC):
         the database table the information is being saved to.
         """
 
-    def load_data(self) -> Dict[str, Any]:
+    def get_indexed_fields(self) -> Tuple[str, ...]:
         """
-        Loads data from a JSON file to an instance of the class.
+        Fields of the records that are looked up by value, like the IDs
+        of other classes. They get a secondary index, see find_records.
+        """
+        return ()
 
-        Returns:
-            (Dict): A dictionary with the saved information. Empty if the
-                    file does not exist or an error occurs.
+    def get_object_hook(self) -> Optional[
+            Callable[[List[Tuple[str, Any]]], Any]]:
         """
+        Hook building each object decoded from the JSON file from its
+        pairs, for records that are not dictionaries. None keeps them as
+        dictionaries.
+        """
+        return None
+
+    def get_index_filename(self) -> str:
+        """Name of the file where the secondary index is saved."""
+        return self.get_filename() + ".idx"
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Groups several operations so a backend that supports it applies
+        them atomically. The JSON files apply each operation on its own.
+        """
+        yield
+
+    def enable_cache(self, flush_interval: Optional[float] = None,
+                     flush_every: Optional[int] = None) -> None:
+        """
+        Keeps the decoded data in memory between operations. The cache is
+        validated against the file modification time and size before use,
+        and changes are written back on flush(), when leaving a with block,
+        or automatically after flush_every saves or flush_interval seconds.
+
+        Parameters:
+            flush_interval (float): Seconds after which a save is flushed.
+            flush_every (int): Number of saves after which it is flushed.
+        """
+        self.cache_enabled = True
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+
+    def is_dirty(self) -> bool:
+        """Returns True if the cache has changes not written to the file."""
+        return self._dirty
+
+    def _file_stamp(self) -> Optional[Tuple[int, ...]]:
+        """Returns the inode, modification time and size of the file."""
+        try:
+            stat = os.stat(self.get_filename())
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read_file(self) -> Dict[str, Any]:
+        """Reads and decodes the whole JSON file."""
         filename = self.get_filename()
         if not os.path.exists(filename):
             return {}
         try:
             with open(filename, 'r', encoding='utf-8') as file:
-                return json.load(file)
+                return json.load(file,
+                                 object_pairs_hook=self.get_object_hook())
         except json.JSONDecodeError as error:
             print(f"Error loading {filename}: {error}. "
                   "Continuing with empty data.")
             return {}
 
+    def _write_file(self, data: Dict[str, Any]) -> None:
+        """
+        Serializes the data to the JSON file. It is written to a temporary
+        file first and moved over the old one, so readers in other
+        processes never see a half written file.
+        """
+        filename = self.get_filename()
+        temp_filename = f"{filename}.{os.getpid()}." \
+                        f"{threading.get_ident()}.tmp"
+        try:
+            with open(temp_filename, 'w', encoding='utf-8') as file:
+                json.dump(data, file, indent=self.indent,
+                          separators=None if self.indent else (',', ':'),
+                          cls=self.json_encoder)
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """
+        Holds an exclusive lock on '<filename>.lock' during the block, so
+        read-modify-write cycles on the file do not interleave between
+        threads or processes. Nested blocks reuse the lock already held.
+        """
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._lock_handle = open(self.get_filename() + ".lock",
+                                         'a+b')
+                lock_file(self._lock_handle)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    unlock_file(self._lock_handle)
+                    self._lock_handle.close()
+                    self._lock_handle = None
+
+    def load_data(self) -> Dict[str, Any]:
+        """
+        Loads data from a JSON file to an instance of the class.
+
+        Returns:
+            (Dict): A dictionary with the saved information. Empty if the
+                    file does not exist or an error occurs.
+        """
+        if not self.cache_enabled:
+            return self._read_file()
+        if self._cache is not None and (
+                self._dirty or self._file_stamp() == self._cache_stamp):
+            return self._cache
+        # Take the stamp before reading so a write in between is noticed
+        # on the next load instead of being hidden by a newer stamp
+        self._cache_stamp = self._file_stamp()
+        self._cache = self._read_file()
+        return self._cache
+
     def save_data(self, data: Dict[str, Any]) -> None:
         """
         Saves the information of the instance to a JSON. This meets the
-        requiement for persintant data.
+        requiement for persintant data. With the cache enabled the data is
+        only written when a flush is due.
+        """
+        self._store(data)
+
+    def _store(self, data: Dict[str, Any],
+               changed_keys: Optional[Iterable[str]] = None) -> None:
+        """
+        Saves the data, updating the secondary index only for the changed
+        keys, or rebuilding it if they are not known.
+        """
+        self._update_index(data, changed_keys)
+        if not self.cache_enabled:
+            self._write_file(data)
+            self._save_index()
+            return
+        self._cache = data
+        self._dirty = True
+        self._pending_ops += 1
+        if self._flush_due():
+            self.flush()
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the record saved with the given key.
+
+        Returns:
+            (Dict): The record, None if the key does not exist.
+        """
+        return self.load_data().get(key)
+
+    def write_record(self, key: str, record: Dict[str, Any],
+                     overwrite: bool = True) -> bool:
+        """
+        Saves a record under the given key.
+
+        Parameters:
+            overwrite (bool): If False an existing record is kept.
+
+        Returns:
+            (bool): True if the record was saved.
+        """
+        with self.locked():
+            data = self.load_data()
+            if not overwrite and key in data:
+                return False
+            data[key] = record
+            self._store(data, [key])
+        return True
+
+    def update_record(self, key: str,
+                      mutate: Callable[[Dict[str, Any]],
+                                       Optional[Dict[str, Any]]]
+                      ) -> Optional[Dict[str, Any]]:
+        """
+        Applies a change to an existing record. The mutate function
+        receives a copy of the record and returns the new one, or None to
+        leave it unchanged. If another writer changes the record first,
+        mutate is called again on the new version.
+
+        Returns:
+            (Dict): The saved record, None if the key does not exist or
+                    the change was declined.
+        """
+        for attempt in range(self.max_retries):
+            record, version = self.read_versioned(key)
+            if record is None:
+                return None
+            record = mutate(copy.deepcopy(record))
+            if record is None:
+                return None
+            if self.compare_and_swap(key, version, record):
+                return record
+            self._backoff(attempt)
+        print(f"Error: Record '{key}' in {self.get_filename()} kept "
+              f"changing, update given up after {self.max_retries} tries.")
+        return None
+
+    def read_versioned(self, key: str) -> Tuple[Optional[Dict[str, Any]],
+                                                 Any]:
+        """
+        Returns the record with the version compare_and_swap checks. For
+        the JSON files the serialized record is its own version.
+        """
+        record = self.read_record(key)
+        return record, json.dumps(record, sort_keys=True,
+                                  cls=self.json_encoder)
+
+    def compare_and_swap(self, key: str, version: Any,
+                         record: Dict[str, Any]) -> bool:
+        """
+        Saves the record only if its version is still the given one.
+
+        Returns:
+            (bool): True if saved, False if the record changed or was
+                    deleted since the version was read.
         """
-        with open(self.get_filename(), 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=4)
+        with self.locked():
+            data = self.load_data()
+            if key not in data or json.dumps(
+                    data[key], sort_keys=True,
+                    cls=self.json_encoder) != version:
+                return False
+            data[key] = record
+            self._store(data, [key])
+        return True
+
+    @contextmanager
+    def batch(self) -> Iterator[Dict[str, Any]]:
+        """
+        Loads the data once for many changes made to it in the block and
+        saves it once at the end, holding the lock in between. Nothing is
+        saved if the block raises an exception.
+        """
+        with self.locked():
+            data = self.load_data()
+            if self.cache_enabled:
+                # The block works on a copy so the cache keeps no change
+                # of a block that raises
+                data = copy.deepcopy(data)
+            yield data
+            self.save_data(data)
+
+    @staticmethod
+    def diff_records(before: Dict[str, Any], after: Dict[str, Any]
+                     ) -> Tuple[Dict[str, Any], List[str]]:
+        """
+        Compares two versions of the data, used by backends that save a
+        batch record by record.
+
+        Parameters:
+            before (Dict): Serialized records, see serialize_records.
+            after (Dict): The changed data.
+
+        Returns:
+            (Tuple): Records added or changed, and keys deleted.
+        """
+        changed = {key: record for key, record in after.items()
+                   if before.get(key) != json.dumps(record, sort_keys=True)}
+        deleted = [key for key in before if key not in after]
+        return changed, deleted
+
+    @staticmethod
+    def serialize_records(data: Dict[str, Any]) -> Dict[str, str]:
+        """Serializes each record to compare it later in diff_records."""
+        return {key: json.dumps(record, sort_keys=True)
+                for key, record in data.items()}
+
+    def _backoff(self, attempt: int) -> None:
+        """Sleeps a random time that grows with each failed attempt."""
+        limit = min(self.retry_backoff_cap,
+                    self.retry_backoff * 2 ** attempt)
+        time.sleep(random.uniform(0, limit))
+
+    def remove_record(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Deletes the record saved with the given key.
+
+        Returns:
+            (Dict): The deleted record, None if the key does not exist.
+        """
+        with self.locked():
+            data = self.load_data()
+            if key not in data:
+                return None
+            record = data.pop(key)
+            self._store(data, [key])
+        return record
+
+    def find_records(self, field: str, value: Any) -> Dict[str, Any]:
+        """
+        Returns the records with the value in one of the fields of
+        get_indexed_fields, using the secondary index.
+
+        Raises:
+            ValueError: If the field is not indexed.
+        """
+        # Take the stamp before reading, an index saved with a later one
+        # could describe data older than the file
+        stamp = self._stamp_list()
+        data = self.load_data()
+        index = self._valid_index()
+        if index is None:
+            index = self._build_index(data)
+            if not self._dirty and stamp is not None:
+                self._save_index(stamp)
+        return {key: data[key] for key in index.lookup(field, value)
+                if key in data}
+
+    def _stamp_list(self) -> Optional[List[int]]:
+        """Returns the file stamp in the form saved with the index."""
+        stamp = self._file_stamp()
+        return None if stamp is None else list(stamp)
+
+    def _valid_index(self) -> Optional[SecondaryIndex]:
+        """
+        Returns the index in memory or the saved one if it describes the
+        current data, None if it has to be rebuilt.
+        """
+        if self._index is not None and (
+                self._dirty or self._index.stamp == self._stamp_list()):
+            return self._index
+        if self._dirty:
+            return None
+        index = SecondaryIndex.load(self.get_index_filename(),
+                                    self.get_indexed_fields())
+        if index is None or index.stamp != self._stamp_list():
+            return None
+        self._index = index
+        return index
+
+    def _build_index(self, data: Dict[str, Any]) -> SecondaryIndex:
+        """Indexes all the records of the data from scratch."""
+        self._index = SecondaryIndex(self.get_indexed_fields())
+        self._index.build(data)
+        return self._index
+
+    def _update_index(self, data: Dict[str, Any],
+                      changed_keys: Optional[Iterable[str]]) -> None:
+        """Brings the index up to date with the data about to be saved."""
+        if not self.get_indexed_fields():
+            return
+        index = self._valid_index()
+        if index is None or changed_keys is None:
+            self._build_index(data)
+            return
+        for key in changed_keys:
+            index.set(key, data.get(key))
+
+    def _save_index(self, stamp: Optional[List[int]] = None) -> None:
+        """
+        Saves the index with the stamp of the data it was built from, by
+        default the one of the data file just written.
+        """
+        if self._index is not None:
+            self._index.stamp = self._stamp_list() if stamp is None \
+                else stamp
+            self._index.save(self.get_index_filename())
+
+    def _flush_due(self) -> bool:
+        """Checks the configured operation count and interval."""
+        if self.flush_every is not None and \
+                self._pending_ops >= self.flush_every:
+            return True
+        return self.flush_interval is not None and \
+            time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self) -> None:
+        """Writes the cached changes to the file if there are any."""
+        if self._dirty and self._cache is not None:
+            self._write_file(self._cache)
+            self._cache_stamp = self._file_stamp()
+            self._save_index()
+        self._dirty = False
+        self._pending_ops = 0
+        self._last_flush = time.monotonic()
+
+    def discard(self) -> None:
+        """
+        Drops the cached changes not written to the file, like the ones a
+        failed flush left behind. The next load reads the file again.
+        """
+        self._cache = None
+        self._cache_stamp = None
+        self._index = None
+        self._dirty = False
+        self._pending_ops = 0
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the records as they are before a group of cached changes,
+        to write them back with restore if the group fails after they were
+        flushed. The records are replaced on change, not changed in place,
+        so a shallow copy keeps them.
+
+        Returns:
+            (Dict): The records, None if the cache is not enabled and the
+                    changes are written as they happen.
+        """
+        if not self.cache_enabled:
+            return None
+        return dict(self.load_data())
+
+    def restore(self, data: Dict[str, Any]) -> None:
+        """Writes back the records taken by snapshot, dropping the cache."""
+        self.discard()
+        self.save_data(data)
+        self.flush()
+
+    def __enter__(self) -> "BaseClass":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.flush()
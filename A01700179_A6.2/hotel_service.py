@@ -0,0 +1,270 @@
+"""
+Module to implement an asyncio service in front of the Hotel System.
+Concurrent requests are accepted in process or through a local socket.
+Reads are answered from memory and the writes that arrive within a short
+window are saved together in a single commit (group commit).
+@author: Carlos Heinze A01700179
+"""
+import sys
+import json
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from hotel_system import Hotel, Customer, Reservation
+from storage_backends import STORAGE_BACKENDS, create_hotel_system
+
+# Operations served by the service, by entity, and if they write
+OPERATIONS = {
+    "hotel": {
+        "create_hotel": True, "create_hotels_bulk": True,
+        "delete_hotel": True, "modify_hotel": True, "reserve_room": True,
+        "cancel_reservation": True, "display_hotel": False,
+        "find_hotels_by_location": False, "is_available": False,
+    },
+    "customer": {
+        "create_customer": True, "create_customers_bulk": True,
+        "delete_customer": True, "modify_customer": True,
+        "display_customer": False, "find_customers_by_email": False,
+    },
+    "reservation": {
+        "create_reservation": True, "create_reservations_bulk": True,
+        "cancel_reservation": True, "cancel_reservations_bulk": True,
+        "display_reservation": False,
+        "find_reservations_by_customer": False,
+        "find_reservations_by_hotel": False,
+    },
+}
+
+PendingWrite = Tuple[Callable, tuple, dict, asyncio.Future]
+
+
+class HotelService:
+    """
+    Serves the operations of a Hotel, Customer and Reservation. The data
+    is kept in the write-back cache of each object, the writes are applied
+    one after the other in memory, and every commit_window seconds the
+    writes applied are flushed together before their callers get the
+    result. On SQLite the writes of a commit share one transaction.
+    """
+
+    def __init__(self, hotel: Hotel, customer: Customer,
+                 reservation: Reservation, commit_window: float = 0.005):
+        """
+        Parameters:
+            commit_window (float): Seconds the first write of a commit
+                                   waits for others to join it.
+        """
+        self.entities = {"hotel": hotel, "customer": customer,
+                         "reservation": reservation}
+        for entity in self.entities.values():
+            entity.enable_cache()
+        self.commit_window = commit_window
+        self.commits = 0
+        self._pending: Optional[asyncio.Queue] = None
+        self._committer: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Starts the task that commits the writes."""
+        self._pending = asyncio.Queue()
+        self._committer = asyncio.create_task(self._commit_loop())
+
+    async def stop(self) -> None:
+        """Commits the writes still waiting and stops the service."""
+        if self._committer is None:
+            return
+        self._committer.cancel()
+        try:
+            await self._committer
+        except asyncio.CancelledError:
+            pass
+        self._committer = None
+        batch = []
+        while not self._pending.empty():
+            batch.append(self._pending.get_nowait())
+        if batch:
+            await self._commit(batch)
+
+    async def __aenter__(self) -> "HotelService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.stop()
+
+    def _resolve(self, operation: str) -> Tuple[Callable, bool]:
+        """
+        Finds the method for an operation named '<entity>.<method>'.
+
+        Raises:
+            ValueError: If the operation is not served.
+        """
+        entity, _, method = operation.partition(".")
+        writes = OPERATIONS.get(entity, {}).get(method)
+        if writes is None:
+            raise ValueError(f"Unknown operation '{operation}'.")
+        return getattr(self.entities[entity], method), writes
+
+    async def call(self, operation: str, *args, **kwargs) -> Any:
+        """
+        Runs an operation like 'hotel.create_hotel' with its arguments.
+        Reads return right away, writes return once committed.
+        """
+        method, writes = self._resolve(operation)
+        if not writes:
+            return method(*args, **kwargs)
+        if self._committer is None:
+            raise RuntimeError("The service is not running.")
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((method, args, kwargs, future))
+        return await future
+
+    async def _commit_loop(self) -> None:
+        """Groups the writes arriving within the window into commits."""
+        while True:
+            batch = [await self._pending.get()]
+            await asyncio.sleep(self.commit_window)
+            while not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            await self._commit(batch)
+
+    async def _commit(self, batch: List[PendingWrite]) -> None:
+        """
+        Applies the writes in memory and saves them all at once. If the
+        commit fails the changes kept in memory are discarded and the
+        entities already written are restored, so the writes its callers
+        are told failed are not saved, now or by a later commit.
+        """
+        results = []
+        snapshots = {name: entity.snapshot()
+                     for name, entity in self.entities.items()}
+        # pylint: disable=broad-except
+        try:
+            with self.entities["reservation"].transaction():
+                for method, args, kwargs, future in batch:
+                    try:
+                        results.append((future, method(*args, **kwargs),
+                                        None))
+                    except Exception as error:
+                        results.append((future, None, error))
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._flush, snapshots)
+        except Exception as error:
+            self._discard()
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        self.commits += 1
+        for future, result, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _flush(self, snapshots: Dict[str, Optional[Dict[str, Any]]]
+               ) -> None:
+        """
+        Writes the cached changes of every entity. If one fails, the ones
+        already written, and the one that failed as it may be written in
+        part, are restored to their snapshots before the error is raised.
+        """
+        started = []
+        try:
+            for name, entity in self.entities.items():
+                started.append(name)
+                entity.flush()
+        except BaseException:
+            for name in started:
+                if snapshots[name] is None:
+                    continue
+                try:
+                    self.entities[name].restore(snapshots[name])
+                except Exception as error:  # pylint: disable=broad-except
+                    print(f"Error: {name} data could not be restored "
+                          f"after a failed commit: {error}")
+            raise
+
+    def _discard(self) -> None:
+        """Drops the cached changes of every entity."""
+        for entity in self.entities.values():
+            entity.discard()
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter) -> None:
+        """
+        Serves a socket connection. Each line is a JSON request like
+        {"op": "hotel.create_hotel", "args": [...], "kwargs": {...}} and
+        is answered with a line {"result": ...} or {"error": "..."}.
+        """
+        tasks = set()
+        lock = asyncio.Lock()
+
+        async def answer(line: bytes) -> None:
+            request = None
+            try:
+                request = json.loads(line)
+                result = await self.call(request["op"],
+                                         *request.get("args", []),
+                                         **request.get("kwargs", {}))
+                response: Dict[str, Any] = {"result": result}
+            except Exception as error:  # pylint: disable=broad-except
+                response = {"error": f"{type(error).__name__}: {error}"}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            task = asyncio.create_task(answer(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+    async def serve(self, host: str = "127.0.0.1",
+                    port: int = 8765) -> asyncio.AbstractServer:
+        """Starts listening on a local socket."""
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+async def run_server(backend: str, port: int) -> None:
+    """Runs the service on a local port until it is interrupted."""
+    async with HotelService(*create_hotel_system(backend)) as service:
+        server = await service.serve(port=port)
+        print(f"Hotel service ({backend}) listening on port {port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    """Main execution function."""
+    args = sys.argv[1:]
+    backend = "json"
+    port = 8765
+    try:
+        while args:
+            option, value, args = args[0], args[1], args[2:]
+            if option == "--backend" and value in STORAGE_BACKENDS:
+                backend = value
+            elif option == "--port":
+                port = int(value)
+            else:
+                raise ValueError(option)
+    except (IndexError, ValueError):
+        print("Error use command: python hotel_service.py "
+              f"[--backend {'|'.join(STORAGE_BACKENDS)}] [--port N]")
+        return
+    try:
+        asyncio.run(run_server(backend, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
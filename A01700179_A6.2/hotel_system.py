@@ -3,7 +3,9 @@ This module implements a hotel system that allows Customers to
 Create Reservations in a Hotel.
 @author: Carlos Antonio Heinze Mortera
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from availability import (DateLike, booked_peak, has_rooms, parse_stay,
+                          public_view, release_rooms, stay_dates, take_rooms)
 from base_class import BaseClass
 
 
@@ -13,6 +15,9 @@ class Hotel(BaseClass):
     def get_filename(self) -> str:
         return "hotels.json"
 
+    def get_indexed_fields(self) -> Tuple[str, ...]:
+        return ("location",)
+
     def create_hotel(self, hotel_id: str, name: str,
                      location: str, rooms: int) -> None:
         """
@@ -24,15 +29,35 @@ class Hotel(BaseClass):
             location (str): City where the hotel is located
             room (int): Number of rooms available in the hotel
         """
-        data = self.load_data()
-        if hotel_id in data:
+        record = {"name": name, "location": location, "rooms": rooms}
+        if not self.write_record(hotel_id, record, overwrite=False):
             print(f"Error: Hotel ID '{hotel_id}' already exists.")
             return False
-
-        data[hotel_id] = {"name": name, "location": location, "rooms": rooms}
-        self.save_data(data)
         return True
 
+    def create_hotels_bulk(self, hotels: Iterable[Tuple[str, str, str, int]]
+                           ) -> List[bool]:
+        """
+        Creates many hotels loading and saving the JSON file only once.
+
+        Parameters:
+            hotels (Iterable): Tuples with the arguments of create_hotel.
+
+        Returns:
+            (List): The result of create_hotel for each hotel.
+        """
+        results = []
+        with self.batch() as data:
+            for hotel_id, name, location, rooms in hotels:
+                if hotel_id in data:
+                    print(f"Error: Hotel ID '{hotel_id}' already exists.")
+                    results.append(False)
+                    continue
+                data[hotel_id] = {"name": name, "location": location,
+                                  "rooms": rooms}
+                results.append(True)
+        return results
+
     def delete_hotel(self, hotel_id: str) -> None:
         """
         Deletes a hotel based on the ID from the JSON file
@@ -41,18 +66,13 @@ class Hotel(BaseClass):
             (bool): True if Hotel was in the JSON and could be
                     deleted. False if it was not found.
         """
-        data = self.load_data()
-        if hotel_id in data:
-            del data[hotel_id]
-            self.save_data(data)
-            return True
-        return False
+        return self.remove_record(hotel_id) is not None
 
     def display_hotel(self, hotel_id: str) -> Dict[str, Any]:
         """Displays the information in consol and return it"""
-        data = self.load_data()
-        if hotel_id in data:
-            hotel_information = data[hotel_id]
+        hotel_information = self.read_record(hotel_id)
+        if hotel_information is not None:
+            hotel_information = public_view(hotel_information)
             print(f"Consulted Hotel: {hotel_information}")
             return hotel_information
         return False
@@ -65,37 +85,83 @@ class Hotel(BaseClass):
 
         Returns:
             (bool): Return True if a modification was possible and
-                    False if not.
+                    False if not, like fewer rooms than the ones booked
+                    on a night.
         """
-        data = self.load_data()
-        if hotel_id in data:
+        def apply_changes(hotel):
+            if rooms is not None and rooms < booked_peak(hotel):
+                print(f"Error: Hotel '{hotel_id}' has {booked_peak(hotel)} "
+                      f"rooms booked on a night, cannot set {rooms}.")
+                return None
             if name is not None:
-                data[hotel_id]["name"] = name
+                hotel["name"] = name
             if location is not None:
-                data[hotel_id]["location"] = location
+                hotel["location"] = location
             if rooms is not None:
-                data[hotel_id]["rooms"] = rooms
-            self.save_data(data)
-            return True
-        return False
+                hotel["rooms"] = rooms
+            return hotel
 
-    def reserve_room(self, hotel_id: str) -> bool:
-        """Decrements the available rooms if greater than zero."""
-        data = self.load_data()
-        if hotel_id in data and data[hotel_id]["rooms"] > 0:
-            data[hotel_id]["rooms"] -= 1
-            self.save_data(data)
-            return True
-        return False
+        return self.update_record(hotel_id, apply_changes) is not None
 
-    def cancel_reservation(self, hotel_id: str) -> bool:
-        """Increments the available rooms for a given hotel."""
-        data = self.load_data()
-        if hotel_id in data:
-            data[hotel_id]["rooms"] += 1
-            self.save_data(data)
-            return True
-        return False
+    def find_hotels_by_location(self, location: str) -> Dict[str, Any]:
+        """
+        Returns the hotels in a location.
+
+        Returns:
+            (Dict): The information of each hotel by its ID.
+        """
+        return {hotel_id: public_view(hotel) for hotel_id, hotel
+                in self.find_records("location", location).items()}
+
+    def is_available(self, hotel_id: str, check_in: DateLike,
+                     check_out: DateLike, rooms: int = 1) -> bool:
+        """
+        Checks if the hotel has the rooms free on every night from
+        check_in to the night before check_out.
+        """
+        stay = parse_stay(check_in, check_out)
+        hotel = self.read_record(hotel_id)
+        if stay is None or hotel is None:
+            return False
+        return has_rooms(hotel, stay, rooms)
+
+    def reserve_room(self, hotel_id: str,
+                     check_in: Optional[DateLike] = None,
+                     check_out: Optional[DateLike] = None) -> bool:
+        """
+        Decrements the available rooms if greater than zero. With the
+        dates of a stay, books a room on each of its nights instead if the
+        hotel has one free on all of them.
+        """
+        stay = None
+        if check_in is not None or check_out is not None:
+            stay = parse_stay(check_in, check_out)
+            if stay is None:
+                return False
+
+        def take_room(hotel):
+            return hotel if take_rooms(hotel, stay) else None
+
+        return self.update_record(hotel_id, take_room) is not None
+
+    def cancel_reservation(self, hotel_id: str,
+                           check_in: Optional[DateLike] = None,
+                           check_out: Optional[DateLike] = None) -> bool:
+        """
+        Increments the available rooms for a given hotel, or frees the
+        room booked for the nights of a stay.
+        """
+        stay = None
+        if check_in is not None or check_out is not None:
+            stay = parse_stay(check_in, check_out)
+            if stay is None:
+                return False
+
+        def free_room(hotel):
+            release_rooms(hotel, stay)
+            return hotel
+
+        return self.update_record(hotel_id, free_room) is not None
 
 
 class Customer(BaseClass):
@@ -104,6 +170,9 @@ class Customer(BaseClass):
     def get_filename(self) -> str:
         return "customers.json"
 
+    def get_indexed_fields(self) -> Tuple[str, ...]:
+        return ("email",)
+
     def create_customer(self, customer_id: str, name: str, email: str) -> None:
         """
         Creates a new customer and saves it.
@@ -112,15 +181,36 @@ class Customer(BaseClass):
             (bool): True if the customer is created and Falase if it already
                     exists
         """
-        data = self.load_data()
-        if customer_id in data:
+        record = {"name": name, "email": email}
+        if not self.write_record(customer_id, record, overwrite=False):
             print(f"Error: Customer ID '{customer_id}' already exists.")
             return False
-
-        data[customer_id] = {"name": name, "email": email}
-        self.save_data(data)
         return True
 
+    def create_customers_bulk(self, customers: Iterable[Tuple[str, str, str]]
+                              ) -> List[bool]:
+        """
+        Creates many customers loading and saving the JSON file only once.
+
+        Parameters:
+            customers (Iterable): Tuples with the arguments of
+                                  create_customer.
+
+        Returns:
+            (List): The result of create_customer for each customer.
+        """
+        results = []
+        with self.batch() as data:
+            for customer_id, name, email in customers:
+                if customer_id in data:
+                    print(f"Error: Customer ID '{customer_id}' "
+                          "already exists.")
+                    results.append(False)
+                    continue
+                data[customer_id] = {"name": name, "email": email}
+                results.append(True)
+        return results
+
     def delete_customer(self, customer_id: str) -> None:
         """
         Deletes a customer by ID.
@@ -129,18 +219,12 @@ class Customer(BaseClass):
             (bool): True if customer was in the JSON and could be
                     deleted. False if it was not found.
         """
-        data = self.load_data()
-        if customer_id in data:
-            del data[customer_id]
-            self.save_data(data)
-            return True
-        return False
+        return self.remove_record(customer_id) is not None
 
     def display_customer(self, customer_id: str) -> Dict[str, Any]:
         """Returns customer data as a dictionary."""
-        data = self.load_data()
-        if customer_id in data:
-            customer_information = data[customer_id]
+        customer_information = self.read_record(customer_id)
+        if customer_information is not None:
             print(f"Customer Requested: {customer_information}")
             return customer_information
         return False
@@ -148,15 +232,23 @@ class Customer(BaseClass):
     def modify_customer(self, customer_id: str, name: Optional[str] = None,
                         email: Optional[str] = None) -> None:
         """Modifies customer information and updates the file."""
-        data = self.load_data()
-        if customer_id in data:
+        def apply_changes(customer):
             if name is not None:
-                data[customer_id]["name"] = name
+                customer["name"] = name
             if email is not None:
-                data[customer_id]["email"] = email
-            self.save_data(data)
-            return True
-        return False
+                customer["email"] = email
+            return customer
+
+        return self.update_record(customer_id, apply_changes) is not None
+
+    def find_customers_by_email(self, email: str) -> Dict[str, Any]:
+        """
+        Returns the customers registered with an email.
+
+        Returns:
+            (Dict): The information of each customer by its ID.
+        """
+        return self.find_records("email", email)
 
 
 class Reservation(BaseClass):
@@ -164,35 +256,132 @@ class Reservation(BaseClass):
 
     def __init__(self, hotel_system: Hotel):
         """Initialize with a reference to a Hotel system to check rooms."""
+        super().__init__()
         self.hotel_system = hotel_system
 
     def get_filename(self) -> str:
         return "reservations.json"
 
+    def get_indexed_fields(self) -> Tuple[str, ...]:
+        return ("customer_id", "hotel_id")
+
+    @staticmethod
+    def _new_reservation(customer_id: str, hotel_id: str,
+                         check_in: Optional[DateLike],
+                         check_out: Optional[DateLike]
+                         ) -> Tuple[Optional[Dict[str, Any]],
+                                    Optional[Tuple[int, int]]]:
+        """
+        Builds the record of a reservation with the nights of its stay.
+
+        Returns:
+            (Tuple): The record and the stay, None for the stay if the
+                     reservation has no dates, None for the record if the
+                     dates are invalid.
+        """
+        record = {"customer_id": customer_id, "hotel_id": hotel_id}
+        if check_in is None and check_out is None:
+            return record, None
+        stay = parse_stay(check_in, check_out)
+        if stay is None:
+            return None, None
+        record["check_in"], record["check_out"] = stay_dates(stay)
+        return record, stay
+
     def create_reservation(self, res_id: str, customer_id: str,
-                           hotel_id: str) -> bool:
+                           hotel_id: str,
+                           check_in: Optional[DateLike] = None,
+                           check_out: Optional[DateLike] = None) -> bool:
         """
-        Creates a reservation if the hotel has available rooms.
+        Creates a reservation if the hotel has available rooms. With
+        check-in and check-out dates the room is only taken for the
+        nights of the stay.
 
         Returns:
-            (bool): True if reservation successful.
+            (bool): True if reservation successful, False if the hotel
+                    has no room or the ID already exists.
         """
-        if self.hotel_system.reserve_room(hotel_id):
-            data = self.load_data()
-            data[res_id] = {"customer_id": customer_id, "hotel_id": hotel_id}
-            self.save_data(data)
-            return True
+        record, _ = self._new_reservation(customer_id, hotel_id,
+                                          check_in, check_out)
+        if record is None:
+            return False
+        with self.transaction():
+            if not self.hotel_system.reserve_room(hotel_id,
+                                                  record.get("check_in"),
+                                                  record.get("check_out")):
+                return False
+            # The ID is claimed under the lock after the room is taken,
+            # so a reservation that exists always holds its room
+            if self.write_record(res_id, record, overwrite=False):
+                return True
+            print(f"Error: Reservation ID '{res_id}' already exists.")
+            self.hotel_system.cancel_reservation(hotel_id,
+                                                 record.get("check_in"),
+                                                 record.get("check_out"))
         return False
 
+    def create_reservations_bulk(self, reservations: Iterable[
+            Tuple[str, str, str]]) -> List[bool]:
+        """
+        Creates many reservations loading and saving the hotels and the
+        reservations only once.
+
+        Parameters:
+            reservations (Iterable): Tuples with the arguments of
+                                     create_reservation, the dates of the
+                                     stay are optional.
+
+        Returns:
+            (List): The result of create_reservation for each one.
+        """
+        results = []
+        with self.transaction(), self.hotel_system.batch() as hotels, \
+                self.batch() as data:
+            for res_id, customer_id, hotel_id, *dates in reservations:
+                check_in, check_out = dates if dates else (None, None)
+                record, stay = self._new_reservation(customer_id, hotel_id,
+                                                     check_in, check_out)
+                if res_id in data:
+                    print(f"Error: Reservation ID '{res_id}' already "
+                          "exists.")
+                    results.append(False)
+                    continue
+                hotel = hotels.get(hotel_id)
+                if record is None or hotel is None or \
+                        not take_rooms(hotel, stay):
+                    results.append(False)
+                    continue
+                data[res_id] = record
+                results.append(True)
+        return results
+
     def display_reservation(self, res_id: str) -> Dict[str, Any]:
         """Returns reservation data as a dictionary."""
-        data = self.load_data()
-        if res_id in data:
-            reservation_information = data[res_id]
+        reservation_information = self.read_record(res_id)
+        if reservation_information is not None:
             print(f'Reservation consulted: {reservation_information}')
             return reservation_information
         return False
 
+    def find_reservations_by_customer(self, customer_id: str
+                                      ) -> Dict[str, Any]:
+        """
+        Returns the reservations of a customer.
+
+        Returns:
+            (Dict): The information of each reservation by its ID.
+        """
+        return self.find_records("customer_id", customer_id)
+
+    def find_reservations_by_hotel(self, hotel_id: str) -> Dict[str, Any]:
+        """
+        Returns the reservations at a hotel.
+
+        Returns:
+            (Dict): The information of each reservation by its ID.
+        """
+        return self.find_records("hotel_id", hotel_id)
+
     def cancel_reservation(self, res_id: str) -> bool:
         """
         Cancels a reservation and frees up a hotel room.
@@ -201,11 +390,41 @@ class Reservation(BaseClass):
             (bool): True if reservation was in the JSON and could be
                     deleted. False if it was not found.
         """
-        data = self.load_data()
-        if res_id in data:
-            hotel_id = data[res_id]["hotel_id"]
-            if self.hotel_system.cancel_reservation(hotel_id):
-                del data[res_id]
-                self.save_data(data)
+        with self.transaction():
+            # Removed under the lock first, so only one of several
+            # cancellations of the same ID frees its room
+            reservation = self.remove_record(res_id)
+            if reservation is None:
+                return False
+            if self.hotel_system.cancel_reservation(
+                    reservation["hotel_id"], reservation.get("check_in"),
+                    reservation.get("check_out")):
                 return True
+            self.write_record(res_id, reservation, overwrite=False)
         return False
+
+    def cancel_reservations_bulk(self, res_ids: Iterable[str]) -> List[bool]:
+        """
+        Cancels many reservations loading and saving the hotels and the
+        reservations only once.
+
+        Returns:
+            (List): The result of cancel_reservation for each ID.
+        """
+        results = []
+        with self.transaction(), self.hotel_system.batch() as hotels, \
+                self.batch() as data:
+            for res_id in res_ids:
+                reservation = data.get(res_id)
+                if reservation is None or \
+                        reservation["hotel_id"] not in hotels:
+                    results.append(False)
+                    continue
+                stay = None
+                if "check_in" in reservation:
+                    stay = parse_stay(reservation["check_in"],
+                                      reservation["check_out"])
+                release_rooms(hotels[reservation["hotel_id"]], stay)
+                del data[res_id]
+                results.append(True)
+        return results
@@ -0,0 +1,180 @@
+"""
+Module to implement a compact JSON lines storage for the classes of the
+Hotel System. Each record is saved minified on its own line and the
+position of every line is kept in an offset table, so a single record is
+read with one seek instead of decoding the whole file.
+@author: Carlos Heinze A01700179
+"""
+import os
+import json
+import threading
+from typing import Dict, Any, IO, Iterable, List, Optional, Tuple
+from base_class import BaseClass
+
+
+class JSONLinesStorage(BaseClass):
+    """
+    Storage backend that writes the records of a class to
+    '<name>.jsonl', one line per record with the JSON of the ID, a tab
+    and the minified JSON of the record. The offset and length of each
+    line are saved to '<name>.jsonl.offsets' with the stamp of the file
+    they describe, and rebuilt by scanning the IDs if they are stale.
+
+    Whole file operations (saves, batch, the cache) work as with the JSON
+    file. Without the cache, read_record and find_records only decode the
+    lines of the records they return.
+
+    It is used by listing it before the Hotel System class, keeping the
+    public API of the class unchanged:
+
+        class JSONLinesHotel(JSONLinesStorage, Hotel):
+            pass
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._offsets: Dict[str, List[int]] = {}
+        self._offsets_stamp: Optional[Tuple[int, ...]] = None
+
+    def get_data_filename(self) -> str:
+        """Name of the JSON lines file, next to the JSON file."""
+        return os.path.splitext(self.get_filename())[0] + ".jsonl"
+
+    def get_offsets_filename(self) -> str:
+        """Name of the file where the offset table is saved."""
+        return self.get_data_filename() + ".offsets"
+
+    @staticmethod
+    def _stamp_of(stat: os.stat_result) -> Tuple[int, ...]:
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _decode_line(line: bytes) -> Tuple[str, Dict[str, Any]]:
+        """Splits a line in the record ID and the record."""
+        key, _, record = line.partition(b"\t")
+        return json.loads(key), json.loads(record)
+
+    def _file_stamp(self) -> Optional[Tuple[int, ...]]:
+        try:
+            return self._stamp_of(os.stat(self.get_data_filename()))
+        except FileNotFoundError:
+            return None
+
+    def _read_file(self) -> Dict[str, Any]:
+        filename = self.get_data_filename()
+        if not os.path.exists(filename):
+            return {}
+        data = {}
+        with open(filename, 'rb') as file:
+            for number, line in enumerate(file, start=1):
+                try:
+                    key, record = self._decode_line(line)
+                except (ValueError, UnicodeDecodeError) as error:
+                    print(f"Error loading {filename} line {number}: "
+                          f"{error}. Continuing with empty data.")
+                    return {}
+                data[key] = record
+        return data
+
+    def _write_file(self, data: Dict[str, Any]) -> None:
+        """
+        Writes the records to a temporary file moved over the old one,
+        saving the offset table with the stamp of the new file.
+        """
+        filename = self.get_data_filename()
+        temp_filename = f"{filename}.{os.getpid()}." \
+                        f"{threading.get_ident()}.tmp"
+        offsets = {}
+        try:
+            with open(temp_filename, 'wb') as file:
+                position = 0
+                for key, record in data.items():
+                    line = (json.dumps(key) + "\t" +
+                            json.dumps(record, separators=(',', ':')) +
+                            "\n").encode('utf-8')
+                    file.write(line)
+                    offsets[key] = [position, len(line)]
+                    position += len(line)
+                file.flush()
+                # The rename keeps the inode, time and size of the file
+                stamp = self._stamp_of(os.fstat(file.fileno()))
+            os.replace(temp_filename, filename)
+        except BaseException:
+            os.remove(temp_filename)
+            raise
+        self._offsets, self._offsets_stamp = offsets, stamp
+        self._save_offsets()
+
+    def _save_offsets(self) -> None:
+        """Saves the offset table with the stamp of its file."""
+        filename = self.get_offsets_filename()
+        temp_filename = f"{filename}.{os.getpid()}." \
+                        f"{threading.get_ident()}.tmp"
+        with open(temp_filename, 'w', encoding='utf-8') as file:
+            json.dump({"stamp": self._offsets_stamp,
+                       "offsets": self._offsets}, file,
+                      separators=(',', ':'))
+        os.replace(temp_filename, filename)
+
+    def _load_offsets(self, stamp: Tuple[int, ...], file: IO[bytes]) -> None:
+        """
+        Makes the offset table describe the open file with the given
+        stamp, from memory, from the saved table or by scanning the IDs.
+        """
+        if self._offsets_stamp == stamp:
+            return
+        try:
+            with open(self.get_offsets_filename(), 'r',
+                      encoding='utf-8') as offsets_file:
+                saved = json.load(offsets_file)
+            if tuple(saved["stamp"]) == stamp:
+                self._offsets = saved["offsets"]
+                self._offsets_stamp = stamp
+                return
+        except (FileNotFoundError, TypeError, KeyError,
+                json.JSONDecodeError):
+            pass
+        offsets = {}
+        position = 0
+        file.seek(0)
+        try:
+            for line in file:
+                key = json.loads(line.partition(b"\t")[0])
+                offsets[key] = [position, len(line)]
+                position += len(line)
+        except (ValueError, UnicodeDecodeError) as error:
+            print(f"Error indexing {self.get_data_filename()}: {error}. "
+                  "Continuing with empty data.")
+            offsets = {}
+        self._offsets, self._offsets_stamp = offsets, stamp
+        self._save_offsets()
+
+    def _read_lines(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Reads only the lines of the given records that exist."""
+        try:
+            file = open(self.get_data_filename(), 'rb')
+        except FileNotFoundError:
+            return {}
+        records = {}
+        with file:
+            self._load_offsets(self._stamp_of(os.fstat(file.fileno())),
+                               file)
+            for key in keys:
+                position = self._offsets.get(key)
+                if position is None:
+                    continue
+                file.seek(position[0])
+                records[key] = self._decode_line(
+                    file.read(position[1]))[1]
+        return records
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.cache_enabled:
+            return super().read_record(key)
+        return self._read_lines([key]).get(key)
+
+    def find_records(self, field: str, value: Any) -> Dict[str, Any]:
+        index = None if self.cache_enabled else self._valid_index()
+        if index is None:
+            return super().find_records(field, value)
+        return self._read_lines(sorted(index.lookup(field, value)))
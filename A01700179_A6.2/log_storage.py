@@ -0,0 +1,255 @@
+"""
+Module to implement an append-only log structured storage for the
+classes of the Hotel System. Each create, modify and delete is appended
+as one JSON line to a log file and replayed into memory at startup, so
+a write no longer rewrites the whole JSON file.
+@author: Carlos Heinze A01700179
+"""
+import os
+import copy
+import json
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from base_class import BaseClass
+from secondary_index import SecondaryIndex
+
+
+class LogStructuredStorage(BaseClass):
+    """
+    Storage backend that keeps the records of a class in memory and
+    persists every change as an appended record in '<filename>.log'. The
+    regular JSON file is used as the snapshot: compaction rewrites it with
+    the current records and empties the log.
+
+    It is used by listing it before the Hotel System class, keeping the
+    public API of the class unchanged:
+
+        class LogHotel(LogStructuredStorage, Hotel):
+            pass
+    """
+
+    # Number of appended records that triggers a compaction
+    compact_after: Optional[int] = 1000
+    # Seconds after the last compaction that trigger a new one
+    compact_interval: Optional[float] = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._records: Optional[Dict[str, Dict[str, Any]]] = None
+        self._snapshot_stamp: Optional[Tuple[int, int]] = None
+        self._log_offset = 0
+        self._log_entries = 0
+        self._last_compaction = time.monotonic()
+
+    def get_log_filename(self) -> str:
+        """Name of the file where the changes are appended."""
+        return self.get_filename() + ".log"
+
+    def _replay(self) -> None:
+        """
+        Loads the snapshot and replays the log into memory. A torn last
+        line left by a crash is ignored, and cut from the log when the
+        lock is held so the next append starts on a clean line.
+        """
+        self._snapshot_stamp = self._file_stamp()
+        self._records = self._read_file()
+        self._load_index()
+        self._log_offset = 0
+        self._log_entries = 0
+        self._replay_log()
+
+    def _replay_log(self) -> None:
+        """Applies the log records written after the current offset."""
+        log_filename = self.get_log_filename()
+        if not os.path.exists(log_filename):
+            return
+        with open(log_filename, 'rb') as log_file:
+            log_file.seek(self._log_offset)
+            lines = log_file.readlines()
+
+        for index, line in enumerate(lines):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("record without end of line")
+                entry = json.loads(line)
+            except (ValueError, UnicodeDecodeError) as error:
+                if index == len(lines) - 1:
+                    # Without the lock it may be an append in progress
+                    if self._lock_depth > 0:
+                        print(f"Ignoring torn record at the end of "
+                              f"{log_filename}: {error}")
+                        with open(log_filename, 'r+b') as log_file:
+                            log_file.truncate(self._log_offset)
+                    return
+                print(f"Skipping corrupt record in {log_filename}: {error}")
+            else:
+                self._apply(entry)
+            self._log_offset += len(line)
+            self._log_entries += 1
+
+    def _load_index(self) -> None:
+        """
+        Loads the index saved with the snapshot, or builds it from the
+        snapshot records. The log is then applied to it record by record.
+        """
+        fields = self.get_indexed_fields()
+        if not fields:
+            return
+        self._index = SecondaryIndex.load(self.get_index_filename(), fields)
+        if self._index is None or \
+                self._index.stamp != self._stamp_list():
+            self._build_index(self._records)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        """Applies a single log record to the records in memory."""
+        if entry.get("op") == "put":
+            self._records[entry["key"]] = entry["value"]
+        elif entry.get("op") == "del":
+            self._records.pop(entry["key"], None)
+        if self._index is not None:
+            self._index.set(entry["key"], self._records.get(entry["key"]))
+
+    def _refresh(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Makes sure the records in memory are current. Records appended by
+        another instance are replayed, and a new snapshot written by a
+        compaction reloads everything.
+        """
+        if self._records is None or \
+                self._file_stamp() != self._snapshot_stamp:
+            self._replay()
+            return self._records
+        try:
+            log_size = os.path.getsize(self.get_log_filename())
+        except FileNotFoundError:
+            log_size = 0
+        if log_size < self._log_offset:
+            self._replay()
+        elif log_size > self._log_offset:
+            self._replay_log()
+        return self._records
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        """Appends a change to the log and applies it in memory."""
+        self._append_all([entry])
+
+    def _append_all(self, entries: List[Dict[str, Any]]) -> None:
+        """Appends several changes to the log with a single write."""
+        lines = b"".join(
+            (json.dumps(entry, separators=(',', ':')) + "\n").encode()
+            for entry in entries)
+        with open(self.get_log_filename(), 'ab') as log_file:
+            log_file.write(lines)
+        for entry in entries:
+            self._apply(entry)
+        self._log_offset += len(lines)
+        self._log_entries += len(entries)
+        if self._compaction_due():
+            self.compact()
+
+    def _compaction_due(self) -> bool:
+        """Checks the configured log size and interval."""
+        if self.compact_after is not None and \
+                self._log_entries >= self.compact_after:
+            return True
+        return self.compact_interval is not None and \
+            time.monotonic() - self._last_compaction >= self.compact_interval
+
+    def compact(self) -> None:
+        """
+        Rewrites the snapshot with the current records and empties the
+        log. The snapshot is replaced atomically before the log is cut, so
+        a crash in between only replays changes already in the snapshot.
+        """
+        with self.locked():
+            self._write_snapshot(self._refresh())
+
+    def _write_snapshot(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Replaces the snapshot with the records and empties the log."""
+        temp_filename = self.get_filename() + ".tmp"
+        with open(temp_filename, 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.get_filename())
+        with open(self.get_log_filename(), 'wb'):
+            pass
+        self._snapshot_stamp = self._file_stamp()
+        self._save_index()
+        self._log_offset = 0
+        self._log_entries = 0
+        self._last_compaction = time.monotonic()
+
+    def load_data(self) -> Dict[str, Any]:
+        """Returns a copy of all the records."""
+        return dict(self._refresh())
+
+    def save_data(self, data: Dict[str, Any]) -> None:
+        """Replaces all the records with the given data."""
+        with self.locked():
+            self._records = dict(data)
+            if self.get_indexed_fields():
+                self._build_index(self._records)
+            self._write_snapshot(self._records)
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._refresh().get(key)
+
+    def find_records(self, field: str, value: Any) -> Dict[str, Any]:
+        records = self._refresh()
+        if self._index is None:
+            raise ValueError(f"Field '{field}' is not indexed.")
+        return {key: records[key]
+                for key in self._index.lookup(field, value)}
+
+    def write_record(self, key: str, record: Dict[str, Any],
+                     overwrite: bool = True) -> bool:
+        with self.locked():
+            records = self._refresh()
+            if not overwrite and key in records:
+                return False
+            self._append({"op": "put", "key": key, "value": record})
+        return True
+
+    def compare_and_swap(self, key: str, version: Any,
+                         record: Dict[str, Any]) -> bool:
+        with self.locked():
+            records = self._refresh()
+            if key not in records or \
+                    json.dumps(records[key], sort_keys=True) != version:
+                return False
+            self._append({"op": "put", "key": key, "value": record})
+        return True
+
+    def remove_record(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.locked():
+            records = self._refresh()
+            if key not in records:
+                return None
+            record = records[key]
+            self._append({"op": "del", "key": key})
+        return record
+
+    @contextmanager
+    def batch(self) -> Iterator[Dict[str, Any]]:
+        """
+        Appends only the records changed in the block. The block gets a
+        deep copy, so the records in memory are unchanged if it raises.
+        """
+        with self.locked():
+            data = copy.deepcopy(self.load_data())
+            before = self.serialize_records(data)
+            yield data
+            changed, deleted = self.diff_records(before, data)
+            self._append_all(
+                [{"op": "put", "key": key, "value": record}
+                 for key, record in changed.items()] +
+                [{"op": "del", "key": key} for key in deleted])
+
+    def flush(self) -> None:
+        """Changes are appended as they happen, nothing to write back."""
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Changes are appended as they happen, nothing to restore."""
+        return None
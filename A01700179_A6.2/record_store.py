@@ -0,0 +1,250 @@
+"""
+Module to implement a compact in-memory model for the records of the
+Hotel System. Records are kept as objects with __slots__ instead of
+dictionaries, and the IDs and locations they repeat are interned so
+every record referring to the same hotel or customer shares one string.
+The JSON layout of the files is unchanged.
+@author: Carlos Heinze A01700179
+"""
+import gc
+import sys
+import json
+from collections.abc import Mapping, MutableMapping
+from typing import (Dict, Any, Callable, Iterable, Iterator, List, Optional,
+                    Tuple, Type)
+from base_class import BaseClass
+from hotel_system import Hotel, Customer, Reservation
+
+
+class Record(MutableMapping):
+    """
+    Record with a slot for each field of its class, used as the
+    dictionary it replaces. A field that is not set is missing from the
+    record, and fields not in FIELDS are kept in 'extra' so converting
+    back to a dictionary loses nothing.
+    """
+
+    __slots__ = ("extra",)
+    # Fields with a slot, in the order they are saved
+    FIELDS: Tuple[str, ...] = ()
+    # Fields whose strings are interned, like the IDs of other records
+    INTERNED: Tuple[str, ...] = ()
+    # Setter of the slot of each field and if its strings are interned,
+    # filled for each subclass
+    _setters: Dict[str, Tuple[Callable[[Any, Any], None], bool]] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._setters = {field: (getattr(cls, field).__set__,
+                                field in cls.INTERNED)
+                        for field in cls.FIELDS}
+
+    def __init__(self, record: Optional[Mapping] = None) -> None:
+        self.extra: Optional[Dict[str, Any]] = None
+        if record:
+            self._fill(record.items())
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[str, Any]]) -> "Record":
+        """Builds a record from the pairs of a decoded JSON object."""
+        record = cls.__new__(cls)
+        record.extra = None
+        record._fill(pairs)
+        return record
+
+    def _fill(self, pairs: Iterable[Tuple[str, Any]]) -> None:
+        """Sets the fields, calling the slot setters directly for speed."""
+        setters = self._setters
+        for field, value in pairs:
+            if field not in setters:
+                self[field] = value
+                continue
+            setter, interned = setters[field]
+            if interned and type(value) is str:
+                value = sys.intern(value)
+            setter(self, value)
+
+    def __getitem__(self, field: str) -> Any:
+        if field in self.FIELDS:
+            try:
+                return getattr(self, field)
+            except AttributeError:
+                raise KeyError(field) from None
+        if self.extra is None:
+            raise KeyError(field)
+        return self.extra[field]
+
+    def __setitem__(self, field: str, value: Any) -> None:
+        if field in self.FIELDS:
+            if field in self.INTERNED and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, field, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[field] = value
+
+    def __delitem__(self, field: str) -> None:
+        if field in self.FIELDS:
+            try:
+                delattr(self, field)
+            except AttributeError:
+                raise KeyError(field) from None
+        else:
+            if self.extra is None:
+                raise KeyError(field)
+            del self.extra[field]
+
+    def __iter__(self) -> Iterator[str]:
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the record as the dictionary saved to the file."""
+        return {field: self[field] for field in self}
+
+
+class HotelRecord(Record):
+    """Record of a hotel, see Hotel.create_hotel."""
+
+    __slots__ = ("name", "location", "rooms", "bookings")
+    FIELDS = __slots__
+    INTERNED = ("location",)
+
+
+class CustomerRecord(Record):
+    """Record of a customer, see Customer.create_customer."""
+
+    __slots__ = ("name", "email")
+    FIELDS = __slots__
+
+
+class ReservationRecord(Record):
+    """Record of a reservation, see Reservation.create_reservation."""
+
+    __slots__ = ("customer_id", "hotel_id", "check_in", "check_out")
+    FIELDS = __slots__
+    INTERNED = __slots__
+
+
+class RecordEncoder(json.JSONEncoder):
+    """JSON encoder writing records as their dictionaries."""
+
+    def default(self, o: Any) -> Any:
+        if isinstance(o, Record):
+            return o.to_dict()
+        return super().default(o)
+
+
+# Record class of each Hotel System class
+RECORD_CLASSES: Tuple[Tuple[type, Type[Record]], ...] = (
+    (Hotel, HotelRecord),
+    (Customer, CustomerRecord),
+    (Reservation, ReservationRecord),
+)
+
+
+class SlottedStorage(BaseClass):
+    """
+    Storage backend that keeps the records held by the cache as Record
+    objects, built while the file is decoded. The files are the same JSON
+    files, and read_record and find_records still return dictionaries.
+
+    Records only pay off for data kept in memory: the cache retains less
+    memory, but loading takes longer than decoding dictionaries, see
+    performance/record_memory.py for both. Without the cache the data is
+    decoded once per operation and dropped, so it stays as dictionaries.
+
+    It is used by listing it before the Hotel System class, keeping the
+    public API of the class unchanged:
+
+        class SlottedHotel(SlottedStorage, Hotel):
+            pass
+    """
+
+    json_encoder = RecordEncoder
+
+    def get_record_class(self) -> Type[Record]:
+        """Record class of the Hotel System class this is mixed into."""
+        for cls, record_class in RECORD_CLASSES:
+            if isinstance(self, cls):
+                return record_class
+        raise TypeError(f"{type(self).__name__} has no record class")
+
+    def to_records(self, data: Dict[str, Any],
+                   keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Converts the dictionaries of the data to records in place, only
+        the ones of the given keys if there are any.
+        """
+        record_class = self.get_record_class()
+        for key in data if keys is None else keys:
+            record = data.get(key)
+            # Checked by type, isinstance of the abstract Mapping is slow
+            if record is not None and type(record) is not record_class:
+                data[key] = record_class(record)
+        return data
+
+    def get_object_hook(self) -> Optional[
+            Callable[[List[Tuple[str, Any]]], Any]]:
+        """
+        With the cache on, builds the records while the file is decoded,
+        so the dictionaries they replace are never created. The objects
+        holding records, like the data itself, and the ones without a
+        field of the record class, like the bookings of a hotel, stay
+        dictionaries.
+        """
+        if not self.cache_enabled:
+            return None
+        record_class = self.get_record_class()
+        fields = set(record_class.FIELDS)
+
+        def build(pairs: List[Tuple[str, Any]]) -> Any:
+            # Only the first pair is checked, to_records converts the
+            # records that start with another field
+            if pairs and pairs[0][0] in fields and \
+                    type(pairs[0][1]) is not record_class:
+                return record_class.from_pairs(pairs)
+            return dict(pairs)
+
+        return build
+
+    def _read_file(self) -> Dict[str, Any]:
+        if not self.cache_enabled:
+            return super()._read_file()
+        # Records are tracked by the garbage collector, unlike dictionaries
+        # of strings, and collections while they are built would take as
+        # long as the decode itself
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            data = super()._read_file()
+        finally:
+            if collecting:
+                gc.enable()
+        return self.to_records(data)
+
+    def _store(self, data: Dict[str, Any],
+               changed_keys: Optional[Iterable[str]] = None) -> None:
+        if changed_keys is not None:
+            changed_keys = list(changed_keys)
+        if self.cache_enabled:
+            self.to_records(data, changed_keys)
+        super()._store(data, changed_keys)
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        record = super().read_record(key)
+        return None if record is None else dict(record)
+
+    def find_records(self, field: str, value: Any) -> Dict[str, Any]:
+        return {key: dict(record) for key, record
+                in super().find_records(field, value).items()}
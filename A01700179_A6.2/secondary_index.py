@@ -0,0 +1,100 @@
+"""
+Module to implement the secondary indexes of the Hotel System, that map
+the values of some fields of the records to the IDs of the records that
+have them, like the reservations of a customer or the hotels of a city.
+@author: Carlos Heinze A01700179
+"""
+import os
+import json
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+
+class SecondaryIndex:
+    """
+    In memory index from the value of each indexed field to the keys of
+    the records with that value. It is updated record by record and saved
+    next to the data file with the stamp of the data it describes, so it
+    is only rebuilt when the data changed without it.
+    """
+
+    def __init__(self, fields: Iterable[str]) -> None:
+        self.fields = tuple(fields)
+        self.stamp: Optional[List[int]] = None
+        self.keys_by_value: Dict[str, Dict[Any, Set[str]]] = {
+            field: {} for field in self.fields}
+        self.values_by_key: Dict[str, List[Any]] = {}
+
+    def set(self, key: str, record: Optional[Dict[str, Any]]) -> None:
+        """Indexes the new version of a record, None if it was deleted."""
+        self.discard(key)
+        if record is None:
+            return
+        values = [record.get(field) for field in self.fields]
+        self.values_by_key[key] = values
+        for field, value in zip(self.fields, values):
+            self.keys_by_value[field].setdefault(value, set()).add(key)
+
+    def discard(self, key: str) -> None:
+        """Removes a record from the index."""
+        values = self.values_by_key.pop(key, None)
+        if values is None:
+            return
+        for field, value in zip(self.fields, values):
+            keys = self.keys_by_value[field][value]
+            keys.discard(key)
+            if not keys:
+                del self.keys_by_value[field][value]
+
+    def build(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Indexes all the records of the data from scratch."""
+        self.keys_by_value = {field: {} for field in self.fields}
+        self.values_by_key = {}
+        for key, record in data.items():
+            self.set(key, record)
+
+    def lookup(self, field: str, value: Any) -> Set[str]:
+        """
+        Returns the keys of the records with the value in the field.
+
+        Raises:
+            ValueError: If the field is not indexed.
+        """
+        if field not in self.keys_by_value:
+            raise ValueError(f"Field '{field}' is not indexed.")
+        return set(self.keys_by_value[field].get(value, ()))
+
+    def save(self, filename: str) -> None:
+        """Writes the index to a file, replacing the previous one."""
+        temp_filename = f"{filename}.{os.getpid()}." \
+                        f"{threading.get_ident()}.tmp"
+        with open(temp_filename, 'w', encoding='utf-8') as file:
+            json.dump({"fields": self.fields, "stamp": self.stamp,
+                       "values": self.values_by_key}, file,
+                      separators=(',', ':'))
+        os.replace(temp_filename, filename)
+
+    @classmethod
+    def load(cls, filename: str,
+             fields: Iterable[str]) -> Optional["SecondaryIndex"]:
+        """
+        Reads an index saved with save.
+
+        Returns:
+            (SecondaryIndex): The index, None if the file does not exist,
+                              is damaged or indexes other fields.
+        """
+        try:
+            with open(filename, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        index = cls(fields)
+        if list(index.fields) != saved.get("fields"):
+            return None
+        index.stamp = saved.get("stamp")
+        index.values_by_key = saved.get("values", {})
+        for key, values in index.values_by_key.items():
+            for field, value in zip(index.fields, values):
+                index.keys_by_value[field].setdefault(value, set()).add(key)
+        return index
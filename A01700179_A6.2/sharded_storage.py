@@ -0,0 +1,232 @@
+"""
+Module to implement a hash sharded storage for the classes of the Hotel
+System. The records of a class are spread over several JSON files by a
+hash of their ID, so a change only rewrites and locks the file of its
+record. It can also be run to reshard an existing data file:
+
+    python sharded_storage.py hotels.json 8
+
+@author: Carlos Heinze A01700179
+"""
+import os
+import sys
+import copy
+import glob
+import zlib
+from contextlib import contextmanager, ExitStack
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+from base_class import BaseClass
+
+
+def shard_filename(filename: str, shard: int, shards: int) -> str:
+    """Name of a shard file, it includes the number of shards."""
+    return f"{filename}.shard-{shard}-of-{shards}"
+
+
+def shard_of(key: str, shards: int) -> int:
+    """Returns the shard of a record ID, the same in every process."""
+    return zlib.crc32(key.encode('utf-8')) % shards
+
+
+class Shard(BaseClass):
+    """One of the JSON files of a sharded class."""
+
+    def __init__(self, filename: str, indexed_fields: Tuple[str, ...]):
+        super().__init__()
+        self.filename = filename
+        self.indexed_fields = indexed_fields
+
+    def get_filename(self) -> str:
+        return self.filename
+
+    def get_indexed_fields(self) -> Tuple[str, ...]:
+        return self.indexed_fields
+
+
+class ShardedStorage(BaseClass):
+    """
+    Storage backend that splits the records of a class over 'shards'
+    JSON files named '<filename>.shard-K-of-N', choosing the file by the
+    CRC32 of the record ID. Each shard is a regular JSON store with its own
+    lock, cache and secondary index, so writers of different shards do not
+    wait for each other. Operations on many records, like batch and
+    find_records, go through every shard.
+
+    It is used by listing it before the Hotel System class, keeping the
+    public API of the class unchanged:
+
+        class ShardedHotel(ShardedStorage, Hotel):
+            pass
+
+    Changing the number of shards needs the data to be moved with reshard.
+    """
+
+    # Number of files the records are split over
+    shards = 8
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._shards: Optional[List[Shard]] = None
+
+    def get_shards(self) -> List[Shard]:
+        """Returns the stores of all the shards, by shard number."""
+        if self._shards is None:
+            self._shards = [
+                Shard(shard_filename(self.get_filename(), shard,
+                                     self.shards),
+                      self.get_indexed_fields())
+                for shard in range(self.shards)]
+            if self.cache_enabled:
+                for shard in self._shards:
+                    shard.enable_cache(self.flush_interval, self.flush_every)
+        return self._shards
+
+    def shard_for(self, key: str) -> Shard:
+        """Returns the store of the shard the record ID belongs to."""
+        return self.get_shards()[shard_of(key, self.shards)]
+
+    def enable_cache(self, flush_interval: Optional[float] = None,
+                     flush_every: Optional[int] = None) -> None:
+        super().enable_cache(flush_interval, flush_every)
+        for shard in self.get_shards():
+            shard.enable_cache(flush_interval, flush_every)
+
+    def is_dirty(self) -> bool:
+        return any(shard.is_dirty() for shard in self.get_shards())
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Holds the lock of every shard, always taken in the same order."""
+        with ExitStack() as stack:
+            for shard in self.get_shards():
+                stack.enter_context(shard.locked())
+            yield
+
+    def load_data(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        for shard in self.get_shards():
+            data.update(shard.load_data())
+        return data
+
+    def save_data(self, data: Dict[str, Any]) -> None:
+        parts: List[Dict[str, Any]] = [{} for _ in range(self.shards)]
+        for key, record in data.items():
+            parts[shard_of(key, self.shards)][key] = record
+        with self.locked():
+            for shard, part in zip(self.get_shards(), parts):
+                shard.save_data(part)
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.shard_for(key).read_record(key)
+
+    def write_record(self, key: str, record: Dict[str, Any],
+                     overwrite: bool = True) -> bool:
+        return self.shard_for(key).write_record(key, record, overwrite)
+
+    def update_record(self, key: str,
+                      mutate: Callable[[Dict[str, Any]],
+                                       Optional[Dict[str, Any]]]
+                      ) -> Optional[Dict[str, Any]]:
+        return self.shard_for(key).update_record(key, mutate)
+
+    def read_versioned(self, key: str) -> Tuple[Optional[Dict[str, Any]],
+                                                 Any]:
+        return self.shard_for(key).read_versioned(key)
+
+    def compare_and_swap(self, key: str, version: Any,
+                         record: Dict[str, Any]) -> bool:
+        return self.shard_for(key).compare_and_swap(key, version, record)
+
+    def remove_record(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.shard_for(key).remove_record(key)
+
+    def find_records(self, field: str, value: Any) -> Dict[str, Any]:
+        if field not in self.get_indexed_fields():
+            raise ValueError(f"Field '{field}' is not indexed.")
+        found: Dict[str, Any] = {}
+        for shard in self.get_shards():
+            found.update(shard.find_records(field, value))
+        return found
+
+    @contextmanager
+    def batch(self) -> Iterator[Dict[str, Any]]:
+        """
+        Loads all the shards for the changes made in the block and saves
+        only the shards with records changed or deleted.
+        """
+        with self.locked():
+            parts = [shard.load_data() for shard in self.get_shards()]
+            # Copied so the cached shards keep no change of a block that
+            # raises
+            data = copy.deepcopy({key: record for part in parts
+                                  for key, record in part.items()})
+            before = self.serialize_records(data)
+            yield data
+            changed, deleted = self.diff_records(before, data)
+            touched: Dict[int, List[str]] = {}
+            for key in list(changed) + deleted:
+                touched.setdefault(shard_of(key, self.shards), []).append(key)
+            for number, keys in touched.items():
+                for key in keys:
+                    if key in data:
+                        parts[number][key] = data[key]
+                    else:
+                        parts[number].pop(key, None)
+                # pylint: disable=protected-access
+                self.get_shards()[number]._store(parts[number], keys)
+
+    def flush(self) -> None:
+        for shard in self.get_shards():
+            shard.flush()
+
+    def discard(self) -> None:
+        for shard in self.get_shards():
+            shard.discard()
+
+
+def reshard(filename: str, shards: int) -> int:
+    """
+    Moves the records of a class to the given number of shards. They are
+    read from the single JSON file or from shards of any other count,
+    which are deleted once the new shards are written.
+
+    Returns:
+        (int): Number of records moved.
+    """
+    sources = [path for path in glob.glob(glob.escape(filename) +
+                                          ".shard-*-of-*")
+               if not path.endswith((".lock", ".idx", ".tmp"))]
+    targets = {shard_filename(filename, shard, shards)
+               for shard in range(shards)}
+    data: Dict[str, Any] = {}
+    if os.path.exists(filename):
+        data.update(Shard(filename, ()).load_data())
+    for path in sources:
+        data.update(Shard(path, ()).load_data())
+
+    storage = type("Resharded", (ShardedStorage,),
+                   {"shards": shards, "get_filename": lambda self: filename})
+    storage().save_data(data)
+    for path in sources:
+        if path not in targets:
+            for leftover in (path, path + ".lock", path + ".idx"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    if os.path.exists(filename):
+        os.replace(filename, filename + ".unsharded")
+    return len(data)
+
+
+def main():
+    """Main execution function."""
+    if len(sys.argv) != 3 or not sys.argv[2].isdigit() or \
+            int(sys.argv[2]) < 1:
+        print("Error use command: python sharded_storage.py "
+              "data.json shards")
+        return
+    moved = reshard(sys.argv[1], int(sys.argv[2]))
+    print(f"Moved {moved} records of {sys.argv[1]} to {sys.argv[2]} shards")
+
+
+if __name__ == "__main__":
+    main()
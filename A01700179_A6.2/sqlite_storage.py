@@ -0,0 +1,209 @@
+"""
+Module to implement a SQLite storage for the classes of the Hotel
+System. The file name of each class is mapped to a table of a single
+database, so related changes in different classes can run inside one
+transaction.
+@author: Carlos Heinze A01700179
+"""
+import os
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Tuple
+from base_class import BaseClass
+
+# One connection per thread and database, shared by all the classes so
+# they take part in the same transaction. Connections inherited from a
+# parent process are never reused
+_CONNECTIONS = threading.local()
+
+
+def get_connection(database: str) -> sqlite3.Connection:
+    """
+    Returns the connection of the current thread to the database,
+    opening it in WAL mode the first time.
+    """
+    if getattr(_CONNECTIONS, "pid", None) != os.getpid():
+        _CONNECTIONS.by_database = {}
+        _CONNECTIONS.pid = os.getpid()
+    connections = _CONNECTIONS.by_database
+    connection = connections.get(database)
+    if connection is None:
+        # Autocommit, transactions are opened explicitly by transaction()
+        connection = sqlite3.connect(database, isolation_level=None,
+                                     timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connections[database] = connection
+    return connection
+
+
+def close_connections() -> None:
+    """Closes the connections opened by the current thread."""
+    connections = getattr(_CONNECTIONS, "by_database", {})
+    for connection in connections.values():
+        connection.close()
+    connections.clear()
+
+
+class SQLiteStorage(BaseClass):
+    """
+    Storage backend that saves the records of a class as rows of a SQLite
+    table named after get_filename(). Records are kept as JSON in the
+    data column with the record ID as primary key, and the fields from
+    get_indexed_fields() get an index each, which SQLite maintains and
+    find_records uses. Every row has a version that is increased on each
+    change, used to update rows optimistically without holding the
+    database write lock while the change is made.
+
+    It is used by listing it before the Hotel System class, keeping the
+    public API of the class unchanged:
+
+        class SQLiteHotel(SQLiteStorage, Hotel):
+            pass
+    """
+
+    database = "hotel_system.db"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._table_ready = False
+
+    def get_table(self) -> str:
+        """Name of the table, the file name without its extension."""
+        name = os.path.splitext(os.path.basename(self.get_filename()))[0]
+        return "".join(char if char.isalnum() else "_" for char in name)
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Returns the connection with the table created."""
+        connection = get_connection(self.database)
+        if not self._table_ready:
+            table = self.get_table()
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id TEXT PRIMARY KEY, data TEXT NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 0)")
+            columns = [row[1] for row in connection.execute(
+                f"PRAGMA table_info({table})")]
+            if "version" not in columns:
+                connection.execute(
+                    f"ALTER TABLE {table} ADD COLUMN "
+                    "version INTEGER NOT NULL DEFAULT 0")
+            for field in self.get_indexed_fields():
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{field} "
+                    f"ON {table} (json_extract(data, '$.{field}'))")
+            self._table_ready = True
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Runs the block in a transaction, committing at the end or rolling
+        back on an exception. Nested blocks join the outer transaction.
+        """
+        connection = self.get_connection()
+        if connection.in_transaction:
+            yield
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def load_data(self) -> Dict[str, Any]:
+        rows = self.get_connection().execute(
+            f"SELECT id, data FROM {self.get_table()}")
+        return {key: json.loads(data) for key, data in rows}
+
+    def save_data(self, data: Dict[str, Any]) -> None:
+        table = self.get_table()
+        with self.transaction():
+            connection = self.get_connection()
+            connection.execute(f"DELETE FROM {table}")
+            connection.executemany(
+                f"INSERT INTO {table} (id, data) VALUES (?, ?)",
+                [(key, json.dumps(record)) for key, record in data.items()])
+
+    def read_record(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.get_connection().execute(
+            f"SELECT data FROM {self.get_table()} WHERE id = ?",
+            (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def find_records(self, field: str, value: Any) -> Dict[str, Any]:
+        if field not in self.get_indexed_fields():
+            raise ValueError(f"Field '{field}' is not indexed.")
+        rows = self.get_connection().execute(
+            f"SELECT id, data FROM {self.get_table()} "
+            f"WHERE json_extract(data, '$.{field}') = ?", (value,))
+        return {key: json.loads(data) for key, data in rows}
+
+    def write_record(self, key: str, record: Dict[str, Any],
+                     overwrite: bool = True) -> bool:
+        table = self.get_table()
+        if overwrite:
+            self.get_connection().execute(
+                f"INSERT INTO {table} (id, data) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data, "
+                "version = version + 1", (key, json.dumps(record)))
+            return True
+        cursor = self.get_connection().execute(
+            f"INSERT OR IGNORE INTO {table} (id, data) VALUES (?, ?)",
+            (key, json.dumps(record)))
+        return cursor.rowcount == 1
+
+    def read_versioned(self, key: str) -> Tuple[Optional[Dict[str, Any]],
+                                                 Any]:
+        row = self.get_connection().execute(
+            f"SELECT data, version FROM {self.get_table()} WHERE id = ?",
+            (key,)).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), row[1]
+
+    def compare_and_swap(self, key: str, version: Any,
+                         record: Dict[str, Any]) -> bool:
+        cursor = self.get_connection().execute(
+            f"UPDATE {self.get_table()} SET data = ?, "
+            "version = version + 1 WHERE id = ? AND version = ?",
+            (json.dumps(record), key, version))
+        return cursor.rowcount == 1
+
+    def remove_record(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.transaction():
+            record = self.read_record(key)
+            if record is not None:
+                self.get_connection().execute(
+                    f"DELETE FROM {self.get_table()} WHERE id = ?", (key,))
+            return record
+
+    @contextmanager
+    def batch(self) -> Iterator[Dict[str, Any]]:
+        """Writes only the rows changed in the block, in one transaction."""
+        table = self.get_table()
+        with self.transaction():
+            data = self.load_data()
+            before = self.serialize_records(data)
+            yield data
+            changed, deleted = self.diff_records(before, data)
+            connection = self.get_connection()
+            connection.executemany(
+                f"INSERT INTO {table} (id, data) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET data = excluded.data, "
+                "version = version + 1",
+                [(key, json.dumps(record))
+                 for key, record in changed.items()])
+            connection.executemany(f"DELETE FROM {table} WHERE id = ?",
+                                   [(key,) for key in deleted])
+
+    def flush(self) -> None:
+        """Rows are committed as they change, nothing to write back."""
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """Rows are committed as they change, nothing to restore."""
+        return None
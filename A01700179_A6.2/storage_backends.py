@@ -0,0 +1,67 @@
+"""
+Module to select the storage backend used by the Hotel System. The JSON
+files of BaseClass are the default, the other backends are mixed in
+front of the Hotel System classes without changing their API.
+@author: Carlos Heinze A01700179
+"""
+from typing import Dict, Optional, Tuple, Type
+from base_class import BaseClass
+from hotel_system import Hotel, Customer, Reservation
+from jsonl_storage import JSONLinesStorage
+from log_storage import LogStructuredStorage
+from record_store import SlottedStorage
+from sharded_storage import ShardedStorage
+from sqlite_storage import SQLiteStorage
+
+STORAGE_BACKENDS: Dict[str, Optional[Type[BaseClass]]] = {
+    "json": None,
+    "log": LogStructuredStorage,
+    "sqlite": SQLiteStorage,
+    "sharded": ShardedStorage,
+    "jsonl": JSONLinesStorage,
+    "slotted": SlottedStorage,
+}
+
+
+def with_backend(cls: Type[BaseClass], backend: str = "json",
+                 **options) -> Type[BaseClass]:
+    """
+    Returns the class using the given storage backend.
+
+    Parameters:
+        cls (Type): Hotel System class, or a subclass of one.
+        backend (str): Key of STORAGE_BACKENDS.
+        options: Class attributes of the backend, like database.
+
+    Returns:
+        (Type): cls itself for the JSON files, otherwise a subclass with
+                the backend placed before it.
+    """
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{backend}'. "
+                         f"Use one of {sorted(STORAGE_BACKENDS)}.")
+    storage = STORAGE_BACKENDS[backend]
+    if storage is None and not options:
+        return cls
+    if storage is None:
+        return type(cls.__name__, (cls,), dict(options))
+    return type(storage.__name__ + cls.__name__, (storage, cls),
+                dict(options))
+
+
+def create_hotel_system(backend: str = "json",
+                        classes: Tuple[Type[Hotel], Type[Customer],
+                                       Type[Reservation]] = (
+                                           Hotel, Customer, Reservation),
+                        **options) -> Tuple[Hotel, Customer, Reservation]:
+    """
+    Creates the Hotel, Customer and Reservation objects sharing the given
+    storage backend.
+
+    Returns:
+        (Tuple): The hotel, customer and reservation objects.
+    """
+    hotel_class, customer_class, reservation_class = (
+        with_backend(cls, backend, **options) for cls in classes)
+    hotel = hotel_class()
+    return hotel, customer_class(), reservation_class(hotel)
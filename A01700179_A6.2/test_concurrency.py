@@ -0,0 +1,140 @@
+"""
+Stress tests for concurrent reservations from several processes.
+"""
+
+import unittest
+import multiprocessing
+import test_hotel_system
+import test_jsonl_storage
+import test_log_storage
+import test_record_store
+import test_sharded_storage
+import test_sqlite_storage
+
+HOTELS = {"HO_1": 25, "HO_2": 15}
+WORKERS = 4
+ATTEMPTS = 30
+SHARED_IDS = 5
+
+
+def book_rooms(classes, worker):
+    """
+    Books rooms in every hotel, cancelling every third reservation made.
+
+    Returns:
+        (int): Number of reservations that were not cancelled.
+    """
+    hotel_class, reservation_class = classes
+    reservation = reservation_class(hotel_class())
+    active = 0
+    for attempt in range(ATTEMPTS):
+        hotel_id = list(HOTELS)[attempt % len(HOTELS)]
+        res_id = f"Res_{worker}_{attempt}"
+        if reservation.create_reservation(res_id, "CT_1", hotel_id):
+            active += 1
+            if attempt % 3 == 0 and reservation.cancel_reservation(res_id):
+                active -= 1
+    return active
+
+
+def contend_for_ids(classes, worker):
+    """
+    Creates and cancels the same reservation IDs as the other workers,
+    so the same ID is booked or cancelled by several of them at once.
+    """
+    hotel_class, reservation_class = classes
+    reservation = reservation_class(hotel_class())
+    for attempt in range(ATTEMPTS):
+        res_id = f"Shared_{(attempt + worker) % SHARED_IDS}"
+        if (attempt + worker) % 2:
+            reservation.cancel_reservation(res_id)
+        else:
+            reservation.create_reservation(res_id, "CT_1", "HO_1")
+
+
+class TestConcurrentReservations(test_hotel_system.HotelSystemTestCase):
+    """Runs reservations from several processes at the same time."""
+
+    def test_rooms_are_not_lost(self):
+        """Test no room is over or under counted under contention"""
+        for hotel_id, rooms in HOTELS.items():
+            self.hotel.create_hotel(hotel_id, "Hotel", "QRO", rooms)
+
+        classes = (self.hotel_class, self.reservation_class)
+        with multiprocessing.Pool(WORKERS) as pool:
+            active = sum(pool.starmap(
+                book_rooms, [(classes, worker) for worker in range(WORKERS)]))
+
+        reservations = self.reservation.load_data()
+        self.assertEqual(len(reservations), active)
+        self.assert_rooms_match(reservations)
+
+    def test_shared_ids_are_booked_once(self):
+        """Test an ID created or cancelled at once moves one room"""
+        for hotel_id, rooms in HOTELS.items():
+            self.hotel.create_hotel(hotel_id, "Hotel", "QRO", rooms)
+
+        classes = (self.hotel_class, self.reservation_class)
+        with multiprocessing.Pool(WORKERS) as pool:
+            pool.starmap(contend_for_ids,
+                         [(classes, worker) for worker in range(WORKERS)])
+
+        self.assert_rooms_match(self.reservation.load_data())
+
+    def assert_rooms_match(self, reservations):
+        """Checks the free rooms plus the reservations are the capacity"""
+        for hotel_id, rooms in HOTELS.items():
+            booked = sum(1 for reservation in reservations.values()
+                         if reservation["hotel_id"] == hotel_id)
+            free_rooms = self.hotel.display_hotel(hotel_id)["rooms"]
+            self.assertGreaterEqual(free_rooms, 0)
+            self.assertEqual(free_rooms + booked, rooms)
+
+
+class TestLogConcurrentReservations(TestConcurrentReservations):
+    """Concurrent reservations on the log structured storage."""
+
+    hotel_class = test_log_storage.LogTestHotel
+    customer_class = test_log_storage.LogTestCustomer
+    reservation_class = test_log_storage.LogTestReservation
+
+
+class TestSQLiteConcurrentReservations(TestConcurrentReservations):
+    """Concurrent reservations on the SQLite storage."""
+
+    hotel_class = test_sqlite_storage.SQLiteTestHotel
+    customer_class = test_sqlite_storage.SQLiteTestCustomer
+    reservation_class = test_sqlite_storage.SQLiteTestReservation
+
+    def _remove_files(self):
+        """Removes the test database and the JSON files."""
+        test_sqlite_storage.remove_database()
+        super()._remove_files()
+
+
+class TestShardedConcurrentReservations(TestConcurrentReservations):
+    """Concurrent reservations on the sharded storage."""
+
+    hotel_class = test_sharded_storage.ShardedTestHotel
+    customer_class = test_sharded_storage.ShardedTestCustomer
+    reservation_class = test_sharded_storage.ShardedTestReservation
+
+
+class TestJSONLinesConcurrentReservations(TestConcurrentReservations):
+    """Concurrent reservations on the JSON lines storage."""
+
+    hotel_class = test_jsonl_storage.JSONLinesTestHotel
+    customer_class = test_jsonl_storage.JSONLinesTestCustomer
+    reservation_class = test_jsonl_storage.JSONLinesTestReservation
+
+
+class TestSlottedConcurrentReservations(TestConcurrentReservations):
+    """Concurrent reservations on the slotted records."""
+
+    hotel_class = test_record_store.SlottedTestHotel
+    customer_class = test_record_store.SlottedTestCustomer
+    reservation_class = test_record_store.SlottedTestReservation
+
+
+if __name__ == "__main__":
+    unittest.main()
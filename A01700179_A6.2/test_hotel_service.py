@@ -0,0 +1,147 @@
+"""
+Unit tests for the asyncio service of the hotel system.
+"""
+
+import unittest
+import io
+import json
+import asyncio
+from contextlib import redirect_stdout
+from unittest import mock
+from test_hotel_system import HotelSystemTestCase
+from hotel_service import HotelService
+
+
+class TestHotelService(HotelSystemTestCase):
+    """Test suite for the group commit service."""
+
+    def test_group_commit(self):
+        """Test concurrent writes are saved together and all persisted"""
+        async def scenario():
+            async with HotelService(self.hotel, self.customer,
+                                    self.reservation,
+                                    commit_window=0.05) as service:
+                await service.call("hotel.create_hotel",
+                                   "HO_1", "Homestay", "QRO", 10)
+                results = await asyncio.gather(*(
+                    service.call("reservation.create_reservation",
+                                 f"RS_{number}", "CT_1", "HO_1")
+                    for number in range(12)))
+                hotel = await service.call("hotel.display_hotel", "HO_1")
+                return results, hotel, service.commits
+
+        results, hotel, commits = asyncio.run(scenario())
+        self.assertEqual(results, [True] * 10 + [False] * 2)
+        self.assertEqual(hotel["rooms"], 0)
+        self.assertEqual(commits, 2)
+        saved = self.reservation_class(self.hotel_class()).load_data()
+        self.assertEqual(len(saved), 10)
+
+    def test_failed_flush(self):
+        """Test the writes of a failed commit are not saved by a later one"""
+        async def scenario():
+            async with HotelService(self.hotel, self.customer,
+                                    self.reservation) as service:
+                for error in (OSError("disk full"), RuntimeError("bug")):
+                    with mock.patch.object(self.customer, "_write_file",
+                                           side_effect=error), \
+                            self.assertRaises(type(error)):
+                        await asyncio.wait_for(service.call(
+                            "customer.create_customer",
+                            "CT_1", "Carlos", "carlos@gmail.com"), 1)
+                    self.assertFalse(await service.call(
+                        "customer.display_customer", "CT_1"))
+                # The service keeps committing after the failures
+                return await asyncio.wait_for(service.call(
+                    "customer.create_customer",
+                    "CT_2", "Jorge", "jorge@gmail.com"), 1)
+
+        self.assertTrue(asyncio.run(scenario()))
+        self.assertEqual(list(self.customer_class().load_data()), ["CT_2"])
+
+    def test_failed_second_flush(self):
+        """Test a commit failing after an entity was written saves nothing"""
+        async def scenario():
+            async with HotelService(self.hotel, self.customer,
+                                    self.reservation,
+                                    commit_window=0.05) as service:
+                await service.call("hotel.create_hotel",
+                                   "HO_1", "Homestay", "QRO", 2)
+                with mock.patch.object(self.reservation, "_write_file",
+                                       side_effect=OSError("disk full")), \
+                        self.assertRaises(OSError):
+                    await asyncio.wait_for(asyncio.gather(
+                        service.call("hotel.create_hotel",
+                                     "HO_2", "Hostel", "GDL", 5),
+                        service.call("reservation.create_reservation",
+                                     "RS_1", "CT_1", "HO_1")), 1)
+
+        with redirect_stdout(io.StringIO()):
+            asyncio.run(scenario())
+        hotels = self.hotel_class().load_data()
+        self.assertEqual(list(hotels), ["HO_1"])
+        self.assertEqual(hotels["HO_1"]["rooms"], 2)
+        self.assertEqual(self.reservation_class(self.hotel_class())
+                         .load_data(), {})
+
+    def test_cancelled_caller(self):
+        """Test a caller that stops waiting does not break the commit"""
+        async def scenario():
+            async with HotelService(self.hotel, self.customer,
+                                    self.reservation,
+                                    commit_window=0.05) as service:
+                with mock.patch.object(self.customer, "_write_file",
+                                       side_effect=OSError("disk full")):
+                    caller = asyncio.create_task(service.call(
+                        "customer.create_customer",
+                        "CT_1", "Carlos", "carlos@gmail.com"))
+                    await asyncio.sleep(0.01)
+                    caller.cancel()
+                    await asyncio.sleep(0.1)
+                return await asyncio.wait_for(service.call(
+                    "customer.create_customer",
+                    "CT_2", "Jorge", "jorge@gmail.com"), 1)
+
+        self.assertTrue(asyncio.run(scenario()))
+
+    def test_unknown_operation(self):
+        """Test only the operations of the hotel system are served"""
+        async def scenario():
+            async with HotelService(self.hotel, self.customer,
+                                    self.reservation) as service:
+                await service.call("hotel.save_data", {})
+
+        with self.assertRaises(ValueError):
+            asyncio.run(scenario())
+
+    def test_socket_requests(self):
+        """Test requests sent as JSON lines through the local socket"""
+        async def scenario():
+            async with HotelService(self.hotel, self.customer,
+                                    self.reservation) as service:
+                server = await service.serve(port=0)
+                port = server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection(
+                    "127.0.0.1", port)
+                requests = [
+                    {"id": 1, "op": "customer.create_customer",
+                     "args": ["CT_1", "Carlos", "carlos@gmail.com"]},
+                    {"id": 2, "op": "customer.unknown"}]
+                for request in requests:
+                    writer.write(json.dumps(request).encode() + b"\n")
+                await writer.drain()
+                responses = [json.loads(await reader.readline())
+                             for _ in requests]
+                writer.close()
+                server.close()
+                await server.wait_closed()
+                return sorted(responses, key=lambda item: item["id"])
+
+        created, unknown = asyncio.run(scenario())
+        self.assertEqual(created, {"id": 1, "result": True})
+        self.assertIn("error", unknown)
+        self.assertIn("CT_1", self.customer_class().load_data())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,13 @@ Unit tests for the hotel reservation system.
 
 import unittest
 import os
+import glob
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 from hotel_system import Hotel, Customer, Reservation
+from secondary_index import SecondaryIndex
 
 
 class TestHotel(Hotel):
@@ -25,14 +31,18 @@ class TestReservation(Reservation):
         return "test_reservations.json"
 
 
-class TestHotelSystem(unittest.TestCase):
-    """Test suite for the hotel reservation system."""
+class HotelSystemTestCase(unittest.TestCase):
+    """Common set up of the test objects and their files."""
+
+    hotel_class = TestHotel
+    customer_class = TestCustomer
+    reservation_class = TestReservation
 
     def setUp(self):
         """Set up test environment with instantiated objects."""
-        self.hotel = TestHotel()
-        self.customer = TestCustomer()
-        self.reservation = TestReservation(self.hotel)
+        self.hotel = self.hotel_class()
+        self.customer = self.customer_class()
+        self.reservation = self.reservation_class(self.hotel)
         self._remove_files()
 
     def tearDown(self):
@@ -47,8 +57,12 @@ class TestHotelSystem(unittest.TestCase):
         for filename in [self.hotel.get_filename(),
                          self.customer.get_filename(),
                          self.reservation.get_filename()]:
-            if os.path.exists(filename):
-                os.remove(filename)
+            for path in glob.glob(filename + "*"):
+                os.remove(path)
+
+
+class TestHotelSystem(HotelSystemTestCase):
+    """Test suite for the hotel reservation system."""
 
     def test_hotel_creation(self):
         """Test creating a Hotel successfully and with a repeated ID"""
@@ -165,6 +179,23 @@ class TestHotelSystem(unittest.TestCase):
             self.reservation.create_reservation("Res_2", "CT_2", "HO_2")
         )
 
+    def test_reservation_repeated_id(self):
+        """Test a repeated reservation ID keeps the room free"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 2)
+        self.reservation.create_reservation("Res_1", "CT_1", "HO_1")
+
+        self.assertFalse(
+            self.reservation.create_reservation("Res_1", "CT_2", "HO_1"))
+        self.assertEqual(self.hotel.display_hotel("HO_1")["rooms"], 1)
+        self.assertEqual(
+            self.reservation.display_reservation("Res_1")["customer_id"],
+            "CT_1")
+
+        # Cancelling it twice frees a single room
+        self.assertTrue(self.reservation.cancel_reservation("Res_1"))
+        self.assertFalse(self.reservation.cancel_reservation("Res_1"))
+        self.assertEqual(self.hotel.display_hotel("HO_1")["rooms"], 2)
+
     def test_reservation_display(self):
         """Test the Display finctionality of the Reservation class"""
 
@@ -198,6 +229,193 @@ class TestHotelSystem(unittest.TestCase):
         self.assertFalse(self.reservation.cancel_reservation("Res_1"))
         self.assertFalse(self.reservation.cancel_reservation("Res_99"))
 
+    def test_bulk_creation(self):
+        """Test creating hotels and customers in bulk"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+
+        results = self.hotel.create_hotels_bulk([
+            ("HO_1", "Dup", "QRO", 5),
+            ("HO_2", "Continental", "CDMX", 1),
+            ("HO_2", "Dup", "CDMX", 1),
+        ])
+        self.assertEqual(results, [False, True, False])
+        self.assertEqual(self.hotel.display_hotel("HO_1")["name"],
+                         "Homestay")
+        self.assertEqual(self.hotel.display_hotel("HO_2")["rooms"], 1)
+
+        results = self.customer.create_customers_bulk([
+            ("CT_1", "Carlos", "carlos@gmail.com"),
+            ("CT_1", "Daniel", "daniel@gmail.com"),
+        ])
+        self.assertEqual(results, [True, False])
+        self.assertEqual(self.customer.display_customer("CT_1")["name"],
+                         "Carlos")
+
+    def test_bulk_reservations(self):
+        """Test creating and cancelling reservations in bulk"""
+        self.hotel.create_hotel("HO_2", "Continental", "CDMX", 2)
+
+        results = self.reservation.create_reservations_bulk([
+            ("Res_1", "CT_2", "HO_2"),
+            ("Res_2", "CT_2", "HO_99"),
+            ("Res_3", "CT_2", "HO_2"),
+            ("Res_4", "CT_2", "HO_2"),
+        ])
+        self.assertEqual(results, [True, False, True, False])
+        self.assertEqual(self.hotel.display_hotel("HO_2")["rooms"], 0)
+
+        results = self.reservation.cancel_reservations_bulk(
+            ["Res_1", "Res_1", "Res_2"])
+        self.assertEqual(results, [True, False, False])
+        self.assertEqual(self.hotel.display_hotel("HO_2")["rooms"], 1)
+        self.assertFalse(self.reservation.display_reservation("Res_1"))
+        self.assertNotEqual(self.reservation.display_reservation("Res_3"),
+                            False)
+
+        # Existing and repeated IDs are rejected without taking a room
+        self.hotel.create_hotel("HO_3", "Hostel", "GDL", 3)
+        results = self.reservation.create_reservations_bulk([
+            ("Res_3", "CT_3", "HO_3"),
+            ("Res_5", "CT_2", "HO_3"),
+            ("Res_5", "CT_3", "HO_3"),
+        ])
+        self.assertEqual(results, [False, True, False])
+        self.assertEqual(self.hotel.display_hotel("HO_3")["rooms"], 2)
+        self.assertEqual(
+            self.reservation.display_reservation("Res_3")["hotel_id"],
+            "HO_2")
+        self.assertEqual(
+            self.reservation.display_reservation("Res_5")["customer_id"],
+            "CT_2")
+
+    def test_failed_bulk_changes_nothing(self):
+        """Test a bulk operation that raises leaves the data unchanged"""
+        self.hotel.create_hotel("HO_2", "Continental", "CDMX", 5)
+
+        for cached in (False, True):
+            if cached:
+                self.hotel.enable_cache()
+                self.reservation.enable_cache()
+            with self.assertRaises(ValueError):
+                self.reservation.create_reservations_bulk([
+                    ("Res_1", "CT_2", "HO_2"), ("Malformed",)])
+            self.assertEqual(self.hotel.display_hotel("HO_2")["rooms"], 5)
+            self.assertFalse(self.reservation.display_reservation("Res_1"))
+
+        # A later write does not save the changes of the failed block
+        self.hotel.modify_hotel("HO_2", name="Continental II")
+        self.hotel.flush()
+        self.assertEqual(self.hotel_class().read_record("HO_2")["rooms"], 5)
+
+    def test_queries(self):
+        """Test the queries keep up with creations, changes and deletions"""
+        self.hotel.create_hotels_bulk([("HO_1", "Homestay", "QRO", 10),
+                                       ("HO_2", "Continental", "CDMX", 5),
+                                       ("HO_3", "FiestaInn", "QRO", 5)])
+        self.assertEqual(set(self.hotel.find_hotels_by_location("QRO")),
+                         {"HO_1", "HO_3"})
+
+        self.hotel.modify_hotel("HO_3", location="CDMX")
+        self.hotel.delete_hotel("HO_2")
+        self.assertEqual(set(self.hotel.find_hotels_by_location("CDMX")),
+                         {"HO_3"})
+
+        self.customer.create_customer("CT_1", "Carlos", "carlos@gmail.com")
+        customers = self.customer.find_customers_by_email("carlos@gmail.com")
+        self.assertEqual(customers["CT_1"]["name"], "Carlos")
+
+        self.reservation.create_reservation("Res_1", "CT_1", "HO_1")
+        self.reservation.create_reservation("Res_2", "CT_1", "HO_3")
+        self.reservation.create_reservation("Res_3", "CT_2", "HO_3")
+        self.reservation.cancel_reservation("Res_2")
+        self.assertEqual(
+            set(self.reservation.find_reservations_by_customer("CT_1")),
+            {"Res_1"})
+        self.assertEqual(
+            set(self.reservation.find_reservations_by_hotel("HO_3")),
+            {"Res_3"})
+
+        # Test a field without an index
+        with self.assertRaises(ValueError):
+            self.hotel.find_records("name", "Homestay")
+
+    def test_dated_reservations(self):
+        """Test reservations only take the room for the nights booked"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 1)
+
+        self.assertTrue(self.reservation.create_reservation(
+            "Res_1", "CT_1", "HO_1", "2026-03-01", "2026-03-04"))
+        # Overlapping stay with the only room already taken
+        self.assertFalse(self.reservation.create_reservation(
+            "Res_2", "CT_2", "HO_1", "2026-03-03", "2026-03-05"))
+        # Check-in the same day of the previous check-out
+        self.assertTrue(self.reservation.create_reservation(
+            "Res_3", "CT_2", "HO_1", "2026-03-04", "2026-03-06"))
+        self.assertEqual(self.hotel.display_hotel("HO_1")["rooms"], 1)
+        self.assertFalse(
+            self.hotel.is_available("HO_1", "2026-03-02", "2026-03-03"))
+        self.assertTrue(
+            self.hotel.is_available("HO_1", "2026-02-20", "2026-03-01"))
+
+        # Cancelling releases exactly the nights of the stay
+        self.assertTrue(self.reservation.cancel_reservation("Res_1"))
+        self.assertTrue(
+            self.hotel.is_available("HO_1", "2026-03-01", "2026-03-04"))
+        self.assertFalse(
+            self.hotel.is_available("HO_1", "2026-03-01", "2026-03-05"))
+
+        # Invalid stays
+        self.assertFalse(self.reservation.create_reservation(
+            "Res_4", "CT_2", "HO_1", "2026-03-10", "2026-03-10"))
+        self.assertFalse(self.reservation.create_reservation(
+            "Res_5", "CT_2", "HO_1", "2026-13-01", "2026-13-02"))
+
+        results = self.reservation.create_reservations_bulk([
+            ("Res_6", "CT_1", "HO_1", "2026-03-01", "2026-03-04"),
+            ("Res_7", "CT_1", "HO_1", "2026-03-05", "2026-03-07"),
+        ])
+        self.assertEqual(results, [True, False])
+        self.assertEqual(
+            self.reservation.cancel_reservations_bulk(["Res_3", "Res_6"]),
+            [True, True])
+        self.assertNotIn("bookings", self.hotel.read_record("HO_1"))
+
+    def test_dated_and_undated_share_rooms(self):
+        """Test a room booked on a night is not also taken for good"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 1)
+        self.reservation.create_reservation(
+            "Res_1", "CT_1", "HO_1", "2026-03-01", "2026-03-04")
+
+        self.assertFalse(
+            self.reservation.create_reservation("Res_2", "CT_2", "HO_1"))
+        self.assertFalse(self.hotel.modify_hotel("HO_1", rooms=0))
+        self.assertEqual(self.hotel.display_hotel("HO_1")["rooms"], 1)
+
+        self.reservation.cancel_reservation("Res_1")
+        self.assertTrue(
+            self.reservation.create_reservation("Res_2", "CT_2", "HO_1"))
+        self.assertFalse(self.reservation.create_reservation(
+            "Res_3", "CT_1", "HO_1", "2026-03-01", "2026-03-04"))
+
+    def test_bookings_are_not_displayed(self):
+        """Test the views leave out the bookings, pruned on cancel"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 3)
+        for number, (check_in, check_out) in enumerate([
+                ("2026-03-01", "2026-03-04"), ("2026-03-02", "2026-03-09"),
+                ("2026-04-10", "2026-04-11")]):
+            self.reservation.create_reservation(f"Res_{number}", "CT_1",
+                                                "HO_1", check_in, check_out)
+
+        expected = {"name": "Homestay", "location": "QRO", "rooms": 3}
+        self.assertEqual(self.hotel.display_hotel("HO_1"), expected)
+        self.assertEqual(self.hotel.find_hotels_by_location("QRO"),
+                         {"HO_1": expected})
+        self.assertIn("bookings", self.hotel.read_record("HO_1"))
+
+        self.reservation.cancel_reservations_bulk(["Res_0", "Res_2"])
+        self.reservation.cancel_reservation("Res_1")
+        self.assertEqual(self.hotel.read_record("HO_1"), expected)
+
     def test_invalid_json_handling(self):
         """Test the system's ability to handle malformed JSON."""
         with open(self.hotel.get_filename(), "w", encoding="utf-8") as file:
@@ -207,5 +425,124 @@ class TestHotelSystem(unittest.TestCase):
         self.assertEqual(data, {})
 
 
+class TestStorageCache(HotelSystemTestCase):
+    """Test suite for the write-back cache of BaseClass."""
+
+    def test_cache_flush_on_exit(self):
+        """Test the cached changes are only written when leaving the with"""
+        self.hotel.enable_cache()
+        with self.hotel:
+            self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+            self.hotel.reserve_room("HO_1")
+            self.assertTrue(self.hotel.is_dirty())
+            self.assertFalse(os.path.exists(self.hotel.get_filename()))
+
+        self.assertFalse(self.hotel.is_dirty())
+        hotel_data = self.hotel_class().display_hotel("HO_1")
+        self.assertEqual(hotel_data["rooms"], 9)
+
+    def test_cache_flush_every(self):
+        """Test the cache is flushed after the configured operations"""
+        self.customer.enable_cache(flush_every=2)
+        self.customer.create_customer("CT_1", "Carlos", "carlos@gmail.com")
+        self.assertFalse(os.path.exists(self.customer.get_filename()))
+
+        self.customer.create_customer("CT_2", "Jorge", "JLopez@outlook.com")
+        self.assertTrue(os.path.exists(self.customer.get_filename()))
+        self.assertIn("CT_2", self.customer_class().load_data())
+
+    def test_cache_detects_external_change(self):
+        """Test a clean cache is reloaded when the file changes on disk"""
+        self.hotel.enable_cache()
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.hotel.flush()
+        self.hotel.load_data()
+
+        self.hotel_class().modify_hotel("HO_1", name="FiestaInn",
+                                        location="CDMX")
+        self.assertEqual(self.hotel.display_hotel("HO_1")["name"],
+                         "FiestaInn")
+
+
+class TestSecondaryIndex(HotelSystemTestCase):
+    """Test suite for the saved secondary index of the JSON files."""
+
+    def test_index_is_saved(self):
+        """Test a new instance uses the index saved by the last write"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.assertTrue(os.path.exists(self.hotel.get_index_filename()))
+
+        with mock.patch.object(SecondaryIndex, "build") as build:
+            self.assertEqual(
+                list(self.hotel_class().find_hotels_by_location("QRO")),
+                ["HO_1"])
+        build.assert_not_called()
+
+    def test_stale_index_is_rebuilt(self):
+        """Test the index is rebuilt if the data changed without it"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        with open(self.hotel.get_filename(), "w", encoding="utf-8") as file:
+            json.dump({"HO_2": {"name": "Continental", "location": "QRO",
+                                "rooms": 1}}, file)
+
+        self.assertEqual(list(self.hotel.find_hotels_by_location("QRO")),
+                         ["HO_2"])
+
+    def test_index_with_cache(self):
+        """Test the index follows the changes kept in the cache"""
+        self.hotel.enable_cache()
+        with self.hotel:
+            self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+            self.assertEqual(list(self.hotel.find_hotels_by_location("QRO")),
+                             ["HO_1"])
+        with mock.patch.object(SecondaryIndex, "build") as build:
+            self.assertEqual(
+                list(self.hotel_class().find_hotels_by_location("QRO")),
+                ["HO_1"])
+        build.assert_not_called()
+
+    def test_index_of_data_changed_while_read(self):
+        """Test an index built before a write is not saved as current"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        os.remove(self.hotel.get_index_filename())
+        load_data = self.hotel.load_data
+
+        def load_then_write():
+            data = load_data()
+            with open(self.hotel.get_filename(), "w",
+                      encoding="utf-8") as file:
+                json.dump({"HO_2": {"name": "Continental",
+                                    "location": "QRO", "rooms": 1}}, file)
+            return data
+
+        with mock.patch.object(self.hotel, "load_data",
+                               side_effect=load_then_write):
+            self.hotel.find_hotels_by_location("QRO")
+        self.assertEqual(
+            list(self.hotel_class().find_hotels_by_location("QRO")),
+            ["HO_2"])
+
+    def test_concurrent_queries(self):
+        """Test threads saving the same index do not break each other"""
+        with open(self.reservation.get_filename(), "w",
+                  encoding="utf-8") as file:
+            json.dump({f"RS_{number}": {"customer_id": f"CT_{number % 4}",
+                                        "hotel_id": "HO_1"}
+                       for number in range(40)}, file)
+        barrier = threading.Barrier(8)
+
+        def query(number):
+            reservation = self.reservation_class(self.hotel_class())
+            barrier.wait()
+            return len(reservation.find_reservations_by_customer(
+                f"CT_{number % 4}"))
+
+        for _ in range(10):
+            if os.path.exists(self.reservation.get_index_filename()):
+                os.remove(self.reservation.get_index_filename())
+            with ThreadPoolExecutor(8) as pool:
+                self.assertEqual(list(pool.map(query, range(8))), [10] * 8)
+
+
 if __name__ == "__main__":
     unittest.main()
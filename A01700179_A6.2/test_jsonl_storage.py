@@ -0,0 +1,83 @@
+"""
+Unit tests for the JSON lines storage of the hotel system.
+"""
+
+import unittest
+import os
+import json
+from unittest import mock
+import test_hotel_system
+from jsonl_storage import JSONLinesStorage
+
+
+class JSONLinesTestHotel(JSONLinesStorage, test_hotel_system.TestHotel):
+    """Test Hotel Class stored as JSON lines"""
+
+
+class JSONLinesTestCustomer(JSONLinesStorage,
+                            test_hotel_system.TestCustomer):
+    """Test Customer Class stored as JSON lines"""
+
+
+class JSONLinesTestReservation(JSONLinesStorage,
+                               test_hotel_system.TestReservation):
+    """Test Reservation Class stored as JSON lines"""
+
+
+class TestJSONLinesHotelSystem(test_hotel_system.TestHotelSystem):
+    """Runs the hotel system test suite on the JSON lines storage."""
+
+    hotel_class = JSONLinesTestHotel
+    customer_class = JSONLinesTestCustomer
+    reservation_class = JSONLinesTestReservation
+
+    def test_one_minified_line_per_record(self):
+        """Test each record is written minified on its own line"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.hotel.create_hotel("HO_2", "Continental", "CDMX", 1)
+
+        with open(self.hotel.get_data_filename(), encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[1], '"HO_2"\t{"name":"Continental",'
+                                   '"location":"CDMX","rooms":1}')
+        self.assertFalse(os.path.exists(self.hotel.get_filename()))
+
+    def test_point_read_skips_other_records(self):
+        """Test a record is read by its offset without loading the file"""
+        for number in range(5):
+            self.hotel.create_hotel(f"HO_{number}", "Hotel", "QRO", number)
+
+        hotel = JSONLinesTestHotel()
+        with mock.patch.object(hotel, "_read_file") as read_file:
+            self.assertEqual(hotel.read_record("HO_3")["rooms"], 3)
+            self.assertIsNone(hotel.read_record("HO_9"))
+            self.assertEqual(len(hotel.find_hotels_by_location("QRO")), 5)
+        read_file.assert_not_called()
+
+    def test_stale_offsets_are_rebuilt(self):
+        """Test the offsets are rebuilt when the file changed without them"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        with open(self.hotel.get_data_filename(), "w",
+                  encoding="utf-8") as file:
+            file.write('"HO_2"\t{"rooms":2}\n"HO_1"\t{"rooms":1}\n')
+
+        self.assertEqual(JSONLinesTestHotel().read_record("HO_1"),
+                         {"rooms": 1})
+
+
+class TestMinifiedJSON(test_hotel_system.HotelSystemTestCase):
+    """Test suite for the indentation option of BaseClass."""
+
+    def test_minified_file(self):
+        """Test the JSON file is written without whitespace"""
+        self.hotel.indent = None
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+
+        with open(self.hotel.get_filename(), encoding="utf-8") as file:
+            content = file.read()
+        self.assertNotIn(" ", content)
+        self.assertEqual(json.loads(content)["HO_1"]["rooms"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Unit tests for the log structured storage of the hotel system.
+"""
+
+import unittest
+import os
+import json
+import test_hotel_system
+from log_storage import LogStructuredStorage
+
+
+class LogTestHotel(LogStructuredStorage, test_hotel_system.TestHotel):
+    """Test Hotel Class stored in an append-only log"""
+
+
+class LogTestCustomer(LogStructuredStorage,
+                      test_hotel_system.TestCustomer):
+    """Test Customer Class stored in an append-only log"""
+
+
+class LogTestReservation(LogStructuredStorage,
+                         test_hotel_system.TestReservation):
+    """Test Reservation Class stored in an append-only log"""
+
+
+class TestLogHotelSystem(test_hotel_system.TestHotelSystem):
+    """Runs the hotel system test suite on the log structured storage."""
+
+    hotel_class = LogTestHotel
+    customer_class = LogTestCustomer
+    reservation_class = LogTestReservation
+
+    def test_changes_are_appended(self):
+        """Test each change appends one record instead of a rewrite"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.hotel.reserve_room("HO_1")
+        self.hotel.delete_hotel("HO_1")
+
+        self.assertFalse(os.path.exists(self.hotel.get_filename()))
+        with open(self.hotel.get_log_filename(), encoding="utf-8") as file:
+            operations = [json.loads(line)["op"] for line in file]
+        self.assertEqual(operations, ["put", "put", "del"])
+
+    def test_replay_from_new_instance(self):
+        """Test a new instance replays the log written by another one"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.hotel.modify_hotel("HO_1", name="FiestaInn")
+
+        self.assertEqual(LogTestHotel().display_hotel("HO_1")["name"],
+                         "FiestaInn")
+
+    def test_torn_last_line(self):
+        """Test a torn record at the end of the log is ignored"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        with open(self.hotel.get_log_filename(), "a",
+                  encoding="utf-8") as file:
+            file.write('{"op": "put", "key": "HO_2", "val')
+
+        hotel = LogTestHotel()
+        self.assertFalse(hotel.display_hotel("HO_2"))
+        self.assertTrue(hotel.create_hotel("HO_2", "Continental", "CDMX", 1))
+        self.assertEqual(LogTestHotel().display_hotel("HO_2")["rooms"], 1)
+
+    def test_compaction(self):
+        """Test compaction writes the snapshot and empties the log"""
+        self.hotel.compact_after = 3
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.hotel.create_hotel("HO_2", "Continental", "CDMX", 1)
+        self.hotel.delete_hotel("HO_1")
+
+        self.assertEqual(os.path.getsize(self.hotel.get_log_filename()), 0)
+        with open(self.hotel.get_filename(), encoding="utf-8") as file:
+            self.assertEqual(list(json.load(file)), ["HO_2"])
+        self.assertEqual(LogTestHotel().display_hotel("HO_2")["rooms"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
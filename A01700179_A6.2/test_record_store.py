@@ -0,0 +1,91 @@
+"""
+Unit tests for the slotted record model of the hotel system.
+"""
+
+import unittest
+import json
+import test_hotel_system
+from record_store import (HotelRecord, ReservationRecord, RecordEncoder,
+                          SlottedStorage)
+
+
+class SlottedTestHotel(SlottedStorage, test_hotel_system.TestHotel):
+    """Test Hotel Class with slotted records"""
+
+
+class SlottedTestCustomer(SlottedStorage, test_hotel_system.TestCustomer):
+    """Test Customer Class with slotted records"""
+
+
+class SlottedTestReservation(SlottedStorage,
+                             test_hotel_system.TestReservation):
+    """Test Reservation Class with slotted records"""
+
+
+class TestSlottedHotelSystem(test_hotel_system.TestHotelSystem):
+    """Runs the hotel system test suite on the slotted records."""
+
+    hotel_class = SlottedTestHotel
+    customer_class = SlottedTestCustomer
+    reservation_class = SlottedTestReservation
+
+    def test_records_are_slotted_and_interned(self):
+        """Test cached records are slotted and share their IDs"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.customer.create_customer("CT_1", "Carlos", "ct1@mail.com")
+        self.reservation.create_reservation("RS_1", "CT_1", "HO_1")
+        self.reservation.create_reservation("RS_2", "CT_1", "HO_1")
+
+        reservation = SlottedTestReservation(self.hotel)
+        self.assertIs(type(reservation.load_data()["RS_1"]), dict)
+        reservation.enable_cache()
+        data = reservation.load_data()
+        self.assertIsInstance(data["RS_1"], ReservationRecord)
+        self.assertFalse(hasattr(data["RS_1"], "__dict__"))
+        self.assertIs(data["RS_1"]["hotel_id"], data["RS_2"]["hotel_id"])
+        self.assertIsInstance(self.reservation.read_record("RS_1"), dict)
+
+    def test_file_layout_is_unchanged(self):
+        """Test the files are the ones the JSON storage reads"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.reservation.create_reservation("RS_1", "CT_1", "HO_1",
+                                            "2025-01-01", "2025-01-03")
+
+        plain = test_hotel_system.TestReservation(
+            test_hotel_system.TestHotel())
+        self.assertEqual(plain.load_data(), {"RS_1": {
+            "customer_id": "CT_1", "hotel_id": "HO_1",
+            "check_in": "2025-01-01", "check_out": "2025-01-03"}})
+
+
+class TestRecord(unittest.TestCase):
+    """Test suite for the conversion of records."""
+
+    def test_round_trip(self):
+        """Test a record converts back to the same dictionary"""
+        saved = {"name": "Homestay", "location": "QRO", "rooms": 10,
+                 "bookings": {"1": [1, 1]}, "stars": 4}
+        record = HotelRecord(saved)
+
+        self.assertEqual(record.to_dict(), saved)
+        self.assertEqual(record, saved)
+        self.assertEqual(json.loads(json.dumps(record, cls=RecordEncoder)),
+                         saved)
+
+    def test_missing_fields(self):
+        """Test fields that are not set behave as missing keys"""
+        record = ReservationRecord({"customer_id": "CT_1",
+                                    "hotel_id": "HO_1"})
+
+        self.assertNotIn("check_in", record)
+        self.assertIsNone(record.get("check_in"))
+        self.assertEqual(len(record), 2)
+        record["check_in"] = "2025-01-01"
+        del record["check_in"]
+        with self.assertRaises(KeyError):
+            del record["check_in"]
+        self.assertEqual(record.pop("stars", None), None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Unit tests for the hash sharded storage of the hotel system.
+"""
+
+import unittest
+import os
+import json
+import test_hotel_system
+from sharded_storage import ShardedStorage, reshard, shard_of
+
+
+class ShardedTestHotel(ShardedStorage, test_hotel_system.TestHotel):
+    """Test Hotel Class split over several JSON files"""
+    shards = 4
+
+
+class ShardedTestCustomer(ShardedStorage,
+                          test_hotel_system.TestCustomer):
+    """Test Customer Class split over several JSON files"""
+    shards = 4
+
+
+class ShardedTestReservation(ShardedStorage,
+                             test_hotel_system.TestReservation):
+    """Test Reservation Class split over several JSON files"""
+    shards = 4
+
+
+class TestShardedHotelSystem(test_hotel_system.TestHotelSystem):
+    """Runs the hotel system test suite on the sharded storage."""
+
+    hotel_class = ShardedTestHotel
+    customer_class = ShardedTestCustomer
+    reservation_class = ShardedTestReservation
+
+    def test_change_touches_one_shard(self):
+        """Test a change only rewrites the shard of its record"""
+        for number in range(8):
+            self.hotel.create_hotel(f"HO_{number}", "Hotel", "QRO", 5)
+        stamps = [os.stat(shard.get_filename()).st_mtime_ns
+                  for shard in self.hotel.get_shards()]
+        self.hotel.reserve_room("HO_3")
+
+        changed = [number for number, shard
+                   in enumerate(self.hotel.get_shards())
+                   if os.stat(shard.get_filename()).st_mtime_ns
+                   != stamps[number]]
+        self.assertEqual(changed, [shard_of("HO_3", 4)])
+        self.assertFalse(os.path.exists(self.hotel.get_filename()))
+
+    def test_reshard(self):
+        """Test a single JSON file is moved to shards and back again"""
+        hotels = {f"HO_{number}": {"name": "Hotel", "location": "QRO",
+                                   "rooms": number}
+                  for number in range(10)}
+        with open(self.hotel.get_filename(), "w", encoding="utf-8") as file:
+            json.dump(hotels, file)
+
+        self.assertEqual(reshard(self.hotel.get_filename(), 4), 10)
+        self.assertEqual(self.hotel.load_data(), hotels)
+        self.assertEqual(len(self.hotel.find_hotels_by_location("QRO")), 10)
+
+        self.assertEqual(reshard(self.hotel.get_filename(), 3), 10)
+        self.assertFalse(os.path.exists(
+            self.hotel.get_shards()[0].get_filename()))
+
+        class ThreeShardHotel(ShardedTestHotel):
+            """Test Hotel Class with the new number of shards"""
+            shards = 3
+
+        self.assertEqual(ThreeShardHotel().load_data(), hotels)
+
+
+if __name__ == "__main__":
+    unittest.main()
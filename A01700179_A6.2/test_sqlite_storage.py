@@ -0,0 +1,94 @@
+"""
+Unit tests for the SQLite storage of the hotel system.
+"""
+
+import unittest
+import os
+import glob
+import test_hotel_system
+from hotel_system import Hotel
+from sqlite_storage import SQLiteStorage, close_connections
+from storage_backends import create_hotel_system, with_backend
+
+
+class SQLiteTestHotel(SQLiteStorage, test_hotel_system.TestHotel):
+    """Test Hotel Class stored in a SQLite table"""
+    database = "test_hotel_system.db"
+
+
+class SQLiteTestCustomer(SQLiteStorage, test_hotel_system.TestCustomer):
+    """Test Customer Class stored in a SQLite table"""
+    database = "test_hotel_system.db"
+
+
+class SQLiteTestReservation(SQLiteStorage,
+                            test_hotel_system.TestReservation):
+    """Test Reservation Class stored in a SQLite table"""
+    database = "test_hotel_system.db"
+
+
+def remove_database():
+    """Closes the connections and removes the test database."""
+    close_connections()
+    for path in glob.glob(SQLiteTestHotel.database + "*"):
+        os.remove(path)
+
+
+class TestSQLiteHotelSystem(test_hotel_system.TestHotelSystem):
+    """Runs the hotel system test suite on the SQLite storage."""
+
+    hotel_class = SQLiteTestHotel
+    customer_class = SQLiteTestCustomer
+    reservation_class = SQLiteTestReservation
+
+    def _remove_files(self):
+        """Removes the test database and the JSON files."""
+        remove_database()
+        super()._remove_files()
+
+    def test_tables_in_one_database(self):
+        """Test the classes are stored as tables of the same database"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 10)
+        self.customer.create_customer("CT_1", "Carlos", "carlos@gmail.com")
+
+        self.assertFalse(os.path.exists(self.hotel.get_filename()))
+        tables = {row[0] for row in self.hotel.get_connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertEqual(tables, {"test_hotels", "test_customers"})
+
+    def test_reservation_rolls_back(self):
+        """Test the room is given back if the reservation insert fails"""
+        self.hotel.create_hotel("HO_1", "Homestay", "QRO", 1)
+
+        def failing_write(*_args, **_kwargs):
+            raise RuntimeError("insert failed")
+
+        self.reservation.write_record = failing_write
+        with self.assertRaises(RuntimeError):
+            self.reservation.create_reservation("Res_1", "CT_1", "HO_1")
+        self.assertEqual(self.hotel.display_hotel("HO_1")["rooms"], 1)
+
+
+class TestStorageBackends(unittest.TestCase):
+    """Test suite for the storage backend selector."""
+
+    def test_json_is_default(self):
+        """Test the JSON files are used unless a backend is selected"""
+        hotel, _, reservation = create_hotel_system()
+        self.assertIs(type(hotel), Hotel)
+        self.assertIs(reservation.hotel_system, hotel)
+
+    def test_backend_options(self):
+        """Test a backend is mixed in with its options"""
+        hotel_class = with_backend(Hotel, "sqlite", database="other.db")
+        self.assertTrue(issubclass(hotel_class, SQLiteStorage))
+        self.assertEqual(hotel_class.database, "other.db")
+
+    def test_unknown_backend(self):
+        """Test selecting a backend that does not exist"""
+        with self.assertRaises(ValueError):
+            with_backend(Hotel, "mongo")
+
+
+if __name__ == "__main__":
+    unittest.main()
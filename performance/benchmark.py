@@ -0,0 +1,327 @@
+"""
+benchmark.py
+Reproducible benchmark suite of the tools of the repository. Each tool
+runs in its own process on seeded synthetic inputs of growing sizes,
+recording its time, throughput and peak memory, how its time scales
+with the size, and the regressions against a stored baseline.
+
+Usage:
+    python performance/benchmark.py [--sizes 1000,10000,100000]
+        [--tools wordCount,hotelSystem] [--repeat 3]
+        [--json results.json] [--baseline baseline.json]
+        [--save-baseline baseline.json]
+
+@author: Carlos Heinze A01700179
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import generators
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOTEL_SYSTEM = os.path.join(ROOT, "A01700179_A6.2")
+
+# Script of each tool and the kind of input it is given
+TOOLS = {
+    "computeStatistics": ("A01700179_A4.2/P1/Source/computeStatistics.py",
+                          "numbers"),
+    "convertNumbers": ("A01700179_A4.2/P2/Source/convertNumbers.py",
+                       "integers"),
+    "wordCount": ("A01700179_A4.2/P3/Source/wordCount.py", "words"),
+    "computeSales": ("A01700179_A5.2/P1/Source/computeSales.py", "sales"),
+    "hotelSystem": (None, "hotel"),
+}
+
+# A run is a regression when it is this much slower or bigger than the
+# baseline, and the time difference is above the noise of small runs.
+# Runs whose time without the interpreter startup is below that noise
+# get no throughput and are left out of the scaling.
+TOLERANCE = 0.25
+MIN_SECONDS = 0.05
+
+# Runs a command from a fresh interpreter and prints its peak RSS. The
+# peak reported by wait4 includes the memory of the process the command
+# was forked from, so the command is not forked from the benchmark,
+# which holds the generated inputs, but from this small process.
+LAUNCHER = """
+import os, sys
+pid = os.fork()
+if pid == 0:
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.execvp(sys.argv[1], sys.argv[1:])
+_, status, usage = os.wait4(pid, 0)
+print(usage.ru_maxrss, flush=True)
+code = os.waitstatus_to_exitcode(status)
+sys.exit(code if code >= 0 else 128 - code)
+"""
+
+
+def run_hotel_workload(size, seed, backend):
+    """Runs the generated hotel workload in the current directory."""
+    sys.path.insert(0, HOTEL_SYSTEM)
+    # pylint: disable=import-outside-toplevel
+    from storage_backends import create_hotel_system
+
+    hotel, customer, reservation = create_hotel_system(backend)
+    targets = {"create_hotel": hotel, "display_hotel": hotel,
+               "create_customer": customer}
+    for name, *args in generators.hotel_operations(size, seed):
+        getattr(targets.get(name, reservation), name)(*args)
+
+
+def measure(command, cwd, timeout=None):
+    """
+    Runs a command with its output discarded. Where the platform has
+    fork and wait4 it runs through LAUNCHER to measure its peak RSS.
+
+    Returns:
+        result (dict): Seconds, peak RSS in KB (None if the platform
+                       does not report it) and return code.
+    """
+    launch = hasattr(os, "fork") and hasattr(os, "wait4")
+    if launch:
+        command = [sys.executable, "-c", LAUNCHER] + command
+    with open(os.path.join(cwd, "stderr.txt"), 'w',
+              encoding='utf-8') as stderr:
+        start = time.perf_counter()
+        # Its own process group, so a timeout also kills the command
+        process = subprocess.Popen(
+            command, cwd=cwd, stderr=stderr, start_new_session=launch,
+            stdout=subprocess.PIPE if launch else subprocess.DEVNULL)
+        timer = threading.Timer(timeout, kill, (process, launch)) \
+            if timeout else None
+        if timer is not None:
+            timer.start()
+        try:
+            output = process.communicate()[0]
+        finally:
+            if timer is not None:
+                timer.cancel()
+        seconds = time.perf_counter() - start
+    peak_rss = None
+    if launch and output.strip().isdigit():
+        peak_rss = int(output)
+        if sys.platform == "darwin":
+            peak_rss //= 1024
+    return {"seconds": seconds, "peak_rss_kb": peak_rss,
+            "returncode": process.returncode}
+
+
+def kill(process, group):
+    """Kills a process, with its process group if it leads one."""
+    try:
+        if group:
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def startup_seconds(workdir):
+    """Seconds an empty interpreter takes, the best of three runs."""
+    return min(measure([sys.executable, "-c", "pass"], workdir)["seconds"]
+               for _ in range(3))
+
+
+def run_benchmark(tool, size, options):
+    """
+    Runs a tool on the input of a size, the best of options.repeat runs.
+    The throughput leaves out the interpreter startup, and is None if
+    the time left is below MIN_SECONDS, as it would only measure noise.
+
+    Returns:
+        result (dict): The measures of the run.
+    """
+    script, kind = TOOLS[tool]
+    if kind == "hotel":
+        command = [sys.executable, os.path.abspath(__file__),
+                   "--hotel-workload", str(size), str(options.seed),
+                   options.backend]
+        input_bytes = 0
+    else:
+        inputs = generators.generate(kind, size, options.seed,
+                                     options.workdir)
+        command = [sys.executable, os.path.join(ROOT, script)] + inputs
+        input_bytes = sum(os.path.getsize(path) for path in inputs)
+
+    best = None
+    for _ in range(options.repeat):
+        run_dir = tempfile.mkdtemp(prefix=f"{tool}_{size}_",
+                                   dir=options.workdir)
+        try:
+            result = measure(command, run_dir, options.timeout)
+        finally:
+            shutil.rmtree(run_dir)
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    net_seconds = best["seconds"] - options.startup
+    if net_seconds < MIN_SECONDS:
+        net_seconds = None
+    best.update({"tool": tool, "size": size, "input_bytes": input_bytes,
+                 "net_seconds": net_seconds,
+                 "throughput": None if net_seconds is None
+                 else size / net_seconds})
+    return best
+
+
+def scaling(results):
+    """
+    Returns for each tool the exponent k of time ~ size^k between its
+    smallest and largest measured sizes, 1 meaning linear. The
+    interpreter startup is left out of the times, and tools with less
+    than two sizes measured above the noise get None.
+    """
+    exponents = {}
+    for tool in dict.fromkeys(result["tool"] for result in results):
+        exponents[tool] = None
+        points = sorted((result["size"], result["net_seconds"])
+                        for result in results if result["tool"] == tool
+                        and result["net_seconds"] is not None)
+        if not points:
+            continue
+        (first_size, first_time), (last_size, last_time) = \
+            points[0], points[-1]
+        if last_size > first_size:
+            exponents[tool] = math.log(last_time / first_time) / \
+                math.log(last_size / first_size)
+    return exponents
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """
+    Compares the results with the baseline ones of the same tool and
+    size.
+
+    Returns:
+        found (list): Messages describing each regression.
+    """
+    previous = {(result["tool"], result["size"]): result
+                for result in baseline}
+    found = []
+    for result in results:
+        base = previous.get((result["tool"], result["size"]))
+        if base is None:
+            continue
+        if result["seconds"] > base["seconds"] * (1 + tolerance) and \
+                result["seconds"] - base["seconds"] > MIN_SECONDS:
+            found.append(f"{result['tool']} at {result['size']}: "
+                         f"{result['seconds']:.4f}s, baseline "
+                         f"{base['seconds']:.4f}s")
+        if result["peak_rss_kb"] and base.get("peak_rss_kb") and \
+                result["peak_rss_kb"] > base["peak_rss_kb"] * (1 + tolerance):
+            found.append(f"{result['tool']} at {result['size']}: "
+                         f"{result['peak_rss_kb']} KB peak RSS, baseline "
+                         f"{base['peak_rss_kb']} KB")
+    return found
+
+
+def report_lines(results, exponents):
+    """Returns the results table and the scaling of each tool."""
+    lines = [f"{'Tool':<18} | {'Size':>10} | {'Seconds':>9} | "
+             f"{'Items/s':>12} | {'Peak RSS KB':>11}"]
+    lines.append("-" * 73)
+    for result in results:
+        status = "" if result["returncode"] == 0 else \
+            f"  (exit {result['returncode']})"
+        throughput = "-" if result["throughput"] is None else \
+            f"{result['throughput']:,.0f}"
+        lines.append(f"{result['tool']:<18} | {result['size']:>10} | "
+                     f"{result['seconds']:>9.4f} | {throughput:>12} | "
+                     f"{result['peak_rss_kb'] or '-':>11}{status}")
+    lines.append("-" * 73)
+    for tool, exponent in exponents.items():
+        lines.append(f"{tool:<18} | " + (
+            f"time ~ size^{exponent:.2f}" if exponent is not None else
+            f"not measured, under two sizes ran {MIN_SECONDS}s or more"))
+    return lines
+
+
+def parse_args(args):
+    """Parses the command line of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="comma separated sizes, 1000 to 100000000")
+    parser.add_argument("--tools", default=",".join(TOOLS),
+                        help="comma separated tools to run")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="runs of each benchmark, the best is kept")
+    parser.add_argument("--backend", default="log",
+                        help="storage backend of the hotel system")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="seconds after which a run is killed")
+    parser.add_argument("--workdir", default=None,
+                        help="directory of the generated inputs, kept "
+                             "between runs (a temporary one by default)")
+    parser.add_argument("--json", help="file to save the results")
+    parser.add_argument("--baseline", help="results to compare against")
+    parser.add_argument("--save-baseline",
+                        help="file to save the results as the baseline")
+    options = parser.parse_args(args)
+    options.sizes = [int(size) for size in options.sizes.split(",")]
+    options.tools = options.tools.split(",")
+    unknown = [tool for tool in options.tools if tool not in TOOLS]
+    if unknown:
+        parser.error(f"unknown tools {unknown}, use {list(TOOLS)}")
+    if any(size < 1 for size in options.sizes) or options.repeat < 1:
+        parser.error("sizes and repeat must be positive")
+    return options
+
+
+def main():
+    """Main execution function."""
+    if len(sys.argv) == 5 and sys.argv[1] == "--hotel-workload":
+        run_hotel_workload(int(sys.argv[2]), int(sys.argv[3]), sys.argv[4])
+        return 0
+
+    options = parse_args(sys.argv[1:])
+    temporary = options.workdir is None
+    if temporary:
+        options.workdir = tempfile.mkdtemp(prefix="benchmark_")
+    else:
+        os.makedirs(options.workdir, exist_ok=True)
+    try:
+        options.startup = startup_seconds(options.workdir)
+        results = [run_benchmark(tool, size, options)
+                   for tool in options.tools for size in options.sizes]
+    finally:
+        if temporary:
+            shutil.rmtree(options.workdir)
+
+    exponents = scaling(results)
+    print("\n".join(report_lines(results, exponents)))
+    summary = {"seed": options.seed, "startup_seconds": options.startup,
+               "results": results, "scaling": exponents}
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=4)
+    if options.save_baseline:
+        with open(options.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=4)
+
+    failed = [result for result in results if result["returncode"] != 0]
+    found = []
+    if options.baseline:
+        with open(options.baseline, 'r', encoding='utf-8') as file:
+            found = regressions(results, json.load(file)["results"])
+        for message in found:
+            print(f"Regression: {message}")
+        if not found:
+            print("No regressions against the baseline.")
+    return 1 if found or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
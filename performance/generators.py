@@ -0,0 +1,214 @@
+"""
+generators.py
+Seeded generators of synthetic input files for the tools of the
+repository, in the same formats as their TC files. The same kind, size
+and seed always give the same file, and files are written as they are
+generated so sizes up to 10^8 entries do not need to fit in memory.
+@author: Carlos Heinze A01700179
+"""
+
+import itertools
+import json
+import os
+import random
+import string
+from datetime import date, timedelta
+
+# Entries written to a file at a time
+CHUNK = 10000
+
+PRODUCT_TYPES = ("dairy", "fruit", "vegetable", "bakery", "meat", "drink")
+
+
+def write_lines(filename, lines):
+    """Writes an iterable of lines to a file in chunks."""
+    with open(filename, 'w', encoding='utf-8') as file:
+        while True:
+            chunk = list(itertools.islice(lines, CHUNK))
+            if not chunk:
+                break
+            file.write("\n".join(chunk) + "\n")
+
+
+def number_lines(size, seed, invalid_rate=0.001):
+    """
+    Yields the lines of a computeStatistics input: normally distributed
+    numbers with a few invalid entries.
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        if rng.random() < invalid_rate:
+            yield rng.choice(("ABC", "12..5", "", "-"))
+        else:
+            yield str(round(rng.gauss(250, 100), rng.choice((0, 2))))
+
+
+def integer_lines(size, seed, invalid_rate=0.001):
+    """
+    Yields the lines of a convertNumbers input: signed integers that fit
+    in 32 bits, with a few invalid entries.
+    """
+    rng = random.Random(seed)
+    for _ in range(size):
+        if rng.random() < invalid_rate:
+            yield rng.choice(("ABC", "1.5", "0x1F"))
+        else:
+            yield str(rng.randint(-2 ** 31, 2 ** 31 - 1))
+
+
+def vocabulary(size, rng):
+    """Returns 'size' distinct made up words."""
+    words = set()
+    while len(words) < size:
+        length = rng.randint(2, 12)
+        words.add("".join(rng.choice(string.ascii_lowercase)
+                          for _ in range(length)))
+    return sorted(words)
+
+
+def vocabulary_size(size):
+    """
+    Distinct words in a corpus of 'size' words, growing with its square
+    root as natural text does (Heaps' law).
+    """
+    return max(10, min(size, int(10 * size ** 0.5)))
+
+
+def word_lines(size, seed, exponent=1.0):
+    """
+    Yields the lines of a wordCount input, one word each, with word
+    frequencies following Zipf's law.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(vocabulary_size(size), rng)
+    rng.shuffle(words)
+    weights = itertools.accumulate(1 / rank ** exponent
+                                   for rank in range(1, len(words) + 1))
+    cum_weights = list(weights)
+    remaining = size
+    while remaining:
+        count = min(CHUNK, remaining)
+        yield from rng.choices(words, cum_weights=cum_weights, k=count)
+        remaining -= count
+
+
+def catalogue_size(size):
+    """Products in the catalogue of 'size' sales."""
+    return max(10, min(10000, size // 10))
+
+
+def catalogue(size, seed):
+    """Returns the products of a computeSales price catalogue."""
+    rng = random.Random(seed)
+    titles = vocabulary(catalogue_size(size), rng)
+    return [{
+        "title": title.capitalize(),
+        "type": rng.choice(PRODUCT_TYPES),
+        "description": f"{title.capitalize()} on the wooden table",
+        "filename": f"{number}.jpg",
+        "height": rng.choice((450, 600)),
+        "width": rng.choice((299, 400)),
+        "price": round(rng.uniform(1, 100), 2),
+        "rating": rng.randint(1, 5),
+    } for number, title in enumerate(titles)]
+
+
+def write_catalogue(filename, size, seed):
+    """Writes the computeSales price catalogue for 'size' sales."""
+    with open(filename, 'w', encoding='utf-8') as file:
+        json.dump(catalogue(size, seed), file, indent=2)
+
+
+def write_sales(filename, size, seed, unknown_rate=0.001):
+    """
+    Writes a computeSales sales record of 'size' sales of the products
+    of the catalogue with the same seed, a few of unknown products.
+    """
+    titles = [product["title"] for product in catalogue(size, seed)]
+    rng = random.Random(seed + 1)
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write("[")
+        sale_id = 1
+        for number in range(size):
+            if rng.random() < 0.3:
+                sale_id += 1
+            product = "Unknown product" if rng.random() < unknown_rate \
+                else rng.choice(titles)
+            sale = {"SALE_ID": sale_id,
+                    "SALE_Date": f"{rng.randint(1, 28):02d}/"
+                                 f"{rng.randint(1, 12):02d}/23",
+                    "Product": product,
+                    "Quantity": rng.randint(1, 10)}
+            file.write(("," if number else "") + "\n  " + json.dumps(sale))
+        file.write("\n]\n")
+
+
+def hotel_operations(size, seed):
+    """
+    Yields a hotel system workload of 'size' operations as tuples of the
+    method name and its arguments: hotels and customers are created
+    first, then a mix of reservations, cancellations, reads and queries.
+    """
+    rng = random.Random(seed)
+    hotels = max(1, size // 100)
+    customers = max(1, size // 20)
+    for number in range(hotels):
+        yield ("create_hotel", f"HO_{number}", f"Hotel {number}",
+               rng.choice(("QRO", "CDMX", "GDL", "MTY")),
+               rng.randint(10, 200))
+    for number in range(customers):
+        yield ("create_customer", f"CT_{number}", f"Customer {number}",
+               f"customer{number}@mail.com")
+    first_night = date(2025, 1, 1)
+    reservations = 0
+    for _ in range(max(0, size - hotels - customers)):
+        choice = rng.random()
+        if choice < 0.5 or reservations == 0:
+            check_in = first_night + timedelta(days=rng.randrange(365))
+            check_out = check_in + timedelta(days=rng.randint(1, 7))
+            yield ("create_reservation", f"RS_{reservations}",
+                   f"CT_{rng.randrange(customers)}",
+                   f"HO_{rng.randrange(hotels)}",
+                   check_in.isoformat(), check_out.isoformat())
+            reservations += 1
+        elif choice < 0.6:
+            yield ("cancel_reservation",
+                   f"RS_{rng.randrange(reservations)}")
+        elif choice < 0.9:
+            yield ("display_hotel", f"HO_{rng.randrange(hotels)}")
+        else:
+            yield ("find_reservations_by_customer",
+                   f"CT_{rng.randrange(customers)}")
+
+
+def generate(kind, size, seed, directory):
+    """
+    Writes the input files of a kind of benchmark unless they exist.
+
+    Args:
+        kind (str): numbers, integers, words or sales.
+        size (int): Number of entries.
+        seed (int): Seed of the random generator.
+        directory (str): Directory of the files.
+
+    Returns:
+        paths (list): The input files, in the order the tool takes them.
+    """
+    prefix = os.path.join(directory, f"{kind}_{size}_{seed}")
+    if kind == "sales":
+        writers = {
+            prefix + ".ProductList.json":
+                lambda path: write_catalogue(path, size, seed),
+            prefix + ".Sales.json":
+                lambda path: write_sales(path, size, seed)}
+    else:
+        lines = {"numbers": number_lines, "integers": integer_lines,
+                 "words": word_lines}[kind]
+        writers = {prefix + ".txt":
+                   lambda path: write_lines(path, lines(size, seed))}
+    for path, write in writers.items():
+        # Written aside first so an interrupted run is not reused
+        if not os.path.exists(path):
+            write(path + ".tmp")
+            os.replace(path + ".tmp", path)
+    return list(writers)
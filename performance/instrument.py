@@ -0,0 +1,268 @@
+"""
+instrument.py
+Opt-in instrumentation for the tools of the repository. The key phases of
+a tool (reading, calculating, sorting, writing and the Hotel System
+storage) are wrapped with monotonic timers and counters of records and
+bytes, without changing the tools themselves.
+
+Usage:
+    python performance/instrument.py [--json metrics.json]
+        [--profile profile.out] [--tracemalloc] tool.py [tool arguments]
+
+@author: Carlos Heinze A01700179
+"""
+
+import cProfile
+import functools
+import importlib.util
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Functions of the tools measured when they are defined by the tool
+TOOL_PHASES = (
+    # computeStatistics.py
+    "read_file", "calculate_mean", "calculate_median", "calculate_mode",
+    "calculate_variance", "print_and_save_data",
+    # convertNumbers.py
+    "convert_number",
+    # wordCount.py
+    "process_file", "sort_dictionary", "write_output",
+    # computeSales.py
+    "process_json", "build_catalogue_index", "price_sales",
+    "calculate_total_sales", "run_batch", "run_ledger", "read_sales_from",
+)
+
+# Methods of the Hotel System storage classes
+STORAGE_PHASES = ("load_data", "save_data", "_read_file", "_write_file")
+
+
+class Metrics:
+    """Timers and counters collected while the instrumentation is on."""
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+
+    @contextmanager
+    def timer(self, name):
+        """
+        Adds the time spent in the block to a timer, using the monotonic
+        performance counter.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            timer = self.timers.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0})
+            timer["calls"] += 1
+            timer["seconds"] += elapsed
+            timer["max_seconds"] = max(timer["max_seconds"], elapsed)
+
+    def count(self, name, amount=1):
+        """Adds an amount to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        """Clears the collected timers and counters."""
+        self.timers.clear()
+        self.counters.clear()
+
+    def to_dict(self):
+        """Returns the metrics as a JSON serializable dictionary."""
+        return {"timers": self.timers, "counters": self.counters}
+
+    def export(self, filename):
+        """Writes the metrics to a JSON file."""
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=4)
+
+    def report_lines(self):
+        """Returns a summary of the metrics, slowest phases first."""
+        lines = [f"{'Phase':<44} | {'Calls':>8} | {'Seconds':>10}"]
+        lines.append("-" * 68)
+        for name, timer in sorted(self.timers.items(),
+                                  key=lambda item: -item[1]["seconds"]):
+            lines.append(f"{name:<44} | {timer['calls']:>8} | "
+                         f"{timer['seconds']:>10.4f}")
+        for name, amount in sorted(self.counters.items()):
+            lines.append(f"{name:<44} | {amount:>21}")
+        return lines
+
+
+# Metrics collected by the wrapped functions
+METRICS = Metrics()
+
+
+def count_records(result):
+    """
+    Number of records in a phase result: its length, or the length of
+    its first item for functions returning (records, ...).
+    """
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, (list, dict, set)):
+        return len(result)
+    return None
+
+
+def measure_tool(_name, args, result):
+    """Counters of a tool phase: records returned and bytes of its file."""
+    counters = {}
+    records = count_records(result)
+    if records is not None:
+        counters["records"] = records
+    if args and isinstance(args[0], str) and os.path.isfile(args[0]):
+        counters["bytes_read"] = os.path.getsize(args[0])
+    return counters
+
+
+def measure_storage(name, args, result):
+    """Counters of a storage method: records loaded or saved and bytes."""
+    storage = args[0]
+    counters = {}
+    if name == "load_data":
+        counters["records"] = len(result)
+    elif name == "save_data":
+        counters["records"] = len(args[1])
+    else:
+        stamp = storage._file_stamp()  # pylint: disable=protected-access
+        size = 0 if stamp is None else stamp[2]
+        key = "bytes_read" if name == "_read_file" else "bytes_written"
+        counters[key] = size
+    return counters
+
+
+def instrument(owner, name, label, measure, metrics=METRICS):
+    """
+    Replaces a function of a module or class with one that times it and
+    adds the counters returned by measure(name, args, result) under the
+    label. Functions already instrumented are left as they are.
+    """
+    function = getattr(owner, name) if not isinstance(owner, type) \
+        else owner.__dict__[name]
+    if getattr(function, "instrumented", False):
+        return
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with metrics.timer(label):
+            result = function(*args, **kwargs)
+        counters = measure(name, args, result)
+        for counter, amount in counters.items():
+            metrics.count(f"{label}.{counter}", amount)
+        return result
+
+    wrapper.instrumented = True
+    setattr(owner, name, wrapper)
+
+
+def instrument_module(module, metrics=METRICS):
+    """Instruments the phases of TOOL_PHASES defined by a tool module."""
+    for name in TOOL_PHASES:
+        if callable(getattr(module, name, None)):
+            instrument(module, name, f"{module.__name__}.{name}",
+                       measure_tool, metrics)
+
+
+def instrument_storage(base_class, metrics=METRICS):
+    """
+    Instruments the storage methods of BaseClass and of the subclasses
+    imported so far that define their own.
+    """
+    pending = [base_class]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        for name in STORAGE_PHASES:
+            if name in cls.__dict__:
+                instrument(cls, name, f"{cls.__name__}.{name}",
+                           measure_storage, metrics)
+
+
+def load_tool(path):
+    """Imports a tool script as a module without running its main."""
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_tool(path, args, profile_file=None, trace_memory=False,
+             metrics=METRICS):
+    """
+    Runs the main function of a tool with its phases instrumented.
+
+    Args:
+        path (str): Path of the tool script.
+        args (list): Command line arguments of the tool.
+        profile_file (str): File for the cProfile stats, None to skip.
+        trace_memory (bool): Records the peak memory with tracemalloc.
+
+    Returns:
+        metrics (Metrics): The metrics collected.
+    """
+    module = load_tool(path)
+    instrument_module(module, metrics)
+    if "base_class" in sys.modules:
+        instrument_storage(sys.modules["base_class"].BaseClass, metrics)
+
+    sys.argv = [path] + list(args)
+    if trace_memory:
+        tracemalloc.start()
+    profiler = cProfile.Profile() if profile_file else None
+    try:
+        with metrics.timer(f"{module.__name__}.main"):
+            if profiler is not None:
+                profiler.runcall(module.main)
+            else:
+                module.main()
+    finally:
+        if trace_memory:
+            metrics.count("tracemalloc.peak_bytes",
+                          tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        if profiler is not None:
+            profiler.dump_stats(profile_file)
+    return metrics
+
+
+def main():
+    """Main execution function."""
+    args = sys.argv[1:]
+    options = {"--json": None, "--profile": None}
+    trace_memory = False
+    while args and args[0].startswith("--"):
+        if args[0] == "--tracemalloc":
+            trace_memory = True
+            args = args[1:]
+        elif args[0] in options and len(args) > 1:
+            options[args[0]] = args[1]
+            args = args[2:]
+        else:
+            break
+    if not args or not os.path.isfile(args[0]):
+        print("Error use command: python instrument.py [--json "
+              "metrics.json] [--profile profile.out] [--tracemalloc] "
+              "tool.py [tool arguments]")
+        return
+
+    metrics = run_tool(args[0], args[1:], options["--profile"],
+                       trace_memory)
+    print("\n".join(metrics.report_lines()))
+    if options["--json"]:
+        metrics.export(options["--json"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+job_runner.py
+Unified runner for computeStatistics, convertNumbers, wordCount and
+computeSales. A pool of long-lived worker processes imports the tools
+once and runs jobs from a manifest or from a local socket concurrently,
+each one writing its result file and console output to its own folder.
+Price catalogues loaded by computeSales jobs are kept by the worker and
+reused by the next jobs on the same catalogue.
+
+Usage:
+    python performance/job_runner.py [--workers N] manifest.json
+    python performance/job_runner.py [--workers N] --serve [--port N]
+
+A manifest is a JSON list of jobs, and the socket takes one job per line:
+    {"id": "tc1", "tool": "wordCount", "args": ["TC1.txt"],
+     "output": "results/tc1"}
+Relative paths are taken from the folder of the manifest, or from the
+folder the runner was started in for the socket.
+
+@author: Carlos Heinze A01700179
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+import traceback
+from contextlib import redirect_stdout
+
+from benchmark import ROOT, TOOLS
+from instrument import load_tool
+
+# Catalogues each worker keeps in memory for the next jobs
+CATALOGUE_CACHE = 4
+
+
+def is_catalogue(data):
+    """Checks if loaded JSON data is a price catalogue."""
+    return isinstance(data, list) and bool(data) and \
+        isinstance(data[0], dict) and "price" in data[0]
+
+
+def reuse_catalogues(module):
+    """
+    Makes the computeSales module keep the catalogues it loads, with
+    their price index, for as long as their file does not change. Other
+    JSON files, like the sales records, are loaded every time.
+    """
+    process_json = module.process_json
+    build_catalogue_index = module.build_catalogue_index
+    catalogues = {}
+
+    def cached_process_json(file_path):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return process_json(file_path)
+        key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        if key in catalogues:
+            return catalogues[key][0]
+        data = process_json(file_path)
+        if is_catalogue(data):
+            if len(catalogues) >= CATALOGUE_CACHE:
+                del catalogues[next(iter(catalogues))]
+            catalogues[key] = [data, None]
+        return data
+
+    def cached_build_catalogue_index(catalogue):
+        for entry in catalogues.values():
+            if entry[0] is catalogue:
+                if entry[1] is None:
+                    entry[1] = build_catalogue_index(catalogue)
+                return entry[1]
+        return build_catalogue_index(catalogue)
+
+    module.process_json = cached_process_json
+    module.build_catalogue_index = cached_build_catalogue_index
+
+
+def load_tools():
+    """Imports the four tools, returning them by name."""
+    modules = {}
+    for tool, (script, _) in TOOLS.items():
+        if script is not None:
+            modules[tool] = load_tool(os.path.join(ROOT, script))
+    reuse_catalogues(modules["computeSales"])
+    return modules
+
+
+def run_job(modules, job):
+    """
+    Runs a job in the current process, inside its output folder.
+
+    Returns:
+        result (dict): ID, status, output folder and seconds of the job.
+    """
+    result = {"id": job["id"], "tool": job["tool"],
+              "output": job["output"]}
+    if "key" in job:
+        result["key"] = job["key"]
+    start = time.perf_counter()
+    cwd = os.getcwd()
+    try:
+        os.makedirs(job["output"], exist_ok=True)
+        with open(os.path.join(job["output"], "console.txt"), 'w',
+                  encoding='utf-8') as console, redirect_stdout(console):
+            os.chdir(job["output"])
+            sys.argv = [job["tool"]] + job["args"]
+            modules[job["tool"]].main()
+        result["status"] = "ok"
+    except Exception:  # pylint: disable=broad-except
+        result["status"] = "error"
+        result["error"] = traceback.format_exc(limit=3)
+    finally:
+        os.chdir(cwd)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def worker_loop(jobs, results):
+    """Runs the jobs of the queue until it receives None."""
+    modules = load_tools()
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        results.put(run_job(modules, job))
+
+
+def prepare_job(job, base, number):
+    """
+    Validates a job and makes its paths absolute.
+
+    Raises:
+        ValueError: If the job is not valid.
+    """
+    if not isinstance(job, dict) or job.get("tool") not in TOOLS or \
+            TOOLS[job["tool"]][0] is None:
+        raise ValueError(f"Job {number} needs a tool of "
+                         f"{[tool for tool in TOOLS if TOOLS[tool][0]]}")
+    args = job.get("args", [])
+    if not isinstance(args, list):
+        raise ValueError(f"Job {number} args must be a list")
+    job_id = str(job.get("id", number))
+    return {
+        "id": job_id,
+        "tool": job["tool"],
+        # Options and numbers are kept, everything else is a path
+        "args": [str(arg) if str(arg).startswith("-") or
+                 str(arg).isdigit() else os.path.join(base, str(arg))
+                 for arg in args],
+        "output": os.path.join(base, job.get("output") or
+                               os.path.join("jobs", job_id)),
+    }
+
+
+class JobRunner:
+    """Pool of worker processes running jobs from a queue."""
+
+    def __init__(self, workers=None):
+        self.jobs = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        # Not daemons, so computeSales --batch can start its own pool
+        self.processes = [
+            multiprocessing.Process(target=worker_loop,
+                                    args=(self.jobs, self.results))
+            for _ in range(workers or os.cpu_count() or 1)]
+
+    def start(self):
+        """Starts the workers, which import the tools once."""
+        for process in self.processes:
+            process.start()
+
+    def stop(self):
+        """Lets the workers finish the queued jobs and stops them."""
+        for _ in self.processes:
+            self.jobs.put(None)
+        for process in self.processes:
+            process.join()
+
+    def submit(self, job):
+        """Queues a job prepared by prepare_job."""
+        self.jobs.put(job)
+
+    def run_all(self, jobs):
+        """Runs a list of prepared jobs, returning results in job order."""
+        for job in jobs:
+            self.submit(job)
+        results = {}
+        for _ in jobs:
+            result = self.results.get()
+            results[result["id"]] = result
+        return [results[job["id"]] for job in jobs]
+
+
+async def serve(runner, port):
+    """
+    Takes jobs as JSON lines on a local port, answering each with its
+    result line when it finishes.
+    """
+    loop = asyncio.get_running_loop()
+    waiting = {}
+    counter = iter(range(1, sys.maxsize))
+
+    async def collect_results():
+        while True:
+            result = await loop.run_in_executor(None, runner.results.get)
+            if result is None:
+                return
+            future = waiting.pop(result.pop("key"), None)
+            if future is not None and not future.done():
+                future.set_result(result)
+
+    async def handle_client(reader, writer):
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            number = next(counter)
+            try:
+                job = prepare_job(json.loads(line), os.getcwd(), number)
+            except ValueError as error:
+                response = {"status": "error", "error": str(error)}
+            else:
+                job["key"] = number
+                waiting[number] = loop.create_future()
+                runner.submit(job)
+                response = await waiting[number]
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+        writer.close()
+
+    collector = asyncio.create_task(collect_results())
+    server = await asyncio.start_server(handle_client, "127.0.0.1", port)
+    print(f"Job runner listening on port {port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        # Wakes up the thread waiting for results so the loop can close
+        runner.results.put(None)
+        await collector
+
+
+def interrupt(_signum, _frame):
+    """Signal handler that stops the runner as Ctrl+C does."""
+    raise KeyboardInterrupt
+
+
+def main():
+    """Main execution function."""
+    args = sys.argv[1:]
+    workers = None
+    port = 8766
+    try:
+        if args[:1] == ["--workers"]:
+            workers, args = int(args[1]), args[2:]
+        serve_jobs = args[:1] == ["--serve"]
+        if serve_jobs and args[1:2] == ["--port"]:
+            port = int(args[2])
+            args = args[3:]
+        elif serve_jobs:
+            args = args[1:]
+        if (serve_jobs and args) or (not serve_jobs and len(args) != 1):
+            raise ValueError("arguments")
+    except (IndexError, ValueError):
+        print("Error use command: python job_runner.py [--workers N] "
+              "manifest.json | --serve [--port N]")
+        return
+
+    if not serve_jobs:
+        try:
+            with open(args[0], 'r', encoding='utf-8') as file:
+                manifest = json.load(file)
+            base = os.path.dirname(os.path.abspath(args[0]))
+            jobs = [prepare_job(job, base, number)
+                    for number, job in enumerate(manifest, start=1)]
+            if len({job["id"] for job in jobs}) != len(jobs):
+                raise ValueError("job IDs must be unique")
+        except (OSError, ValueError, TypeError) as error:
+            print(f"Error in manifest {args[0]}: {error}")
+            return
+
+    runner = JobRunner(workers)
+    runner.start()
+    # Stopped like with Ctrl+C, letting the workers finish
+    signal.signal(signal.SIGTERM, interrupt)
+    try:
+        if serve_jobs:
+            asyncio.run(serve(runner, port))
+            return
+        start = time.perf_counter()
+        for result in runner.run_all(jobs):
+            print(f"{result['id']:<20} | {result['tool']:<18} | "
+                  f"{result['status']:<6} | {result['seconds']:.4f}s | "
+                  f"{result['output']}")
+            if result["status"] != "ok":
+                print(result["error"])
+        print(f"Elapsed Time: {time.perf_counter() - start:.4f} seconds")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
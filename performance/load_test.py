@@ -0,0 +1,334 @@
+"""
+load_test.py
+Load generator for the Hotel System. Several processes, each with
+several threads, run a configurable mix of operations against Hotel,
+Customer and Reservation objects sharing one storage backend. It
+reports the throughput and the p50/p99/p999 latency of each operation,
+and checks at the end that no room was lost or booked twice: the free
+rooms of each hotel plus its reservations equal its capacity.
+
+Usage:
+    python performance/load_test.py [--backend log] [--processes 4]
+        [--threads 4] [--operations 500] [--hotels 20] [--customers 200]
+        [--rooms 50] [--mix reserve=40,cancel=15,display=25,modify=10,
+        create=10] [--json results.json]
+
+@author: Carlos Heinze A01700179
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from benchmark import HOTEL_SYSTEM
+
+sys.path.insert(0, HOTEL_SYSTEM)
+# pylint: disable=wrong-import-position
+from storage_backends import STORAGE_BACKENDS, create_hotel_system  # noqa
+
+OPERATIONS = ("reserve", "cancel", "display", "modify", "create")
+DEFAULT_MIX = "reserve=40,cancel=15,display=25,modify=10,create=10"
+PERCENTILES = (("p50", 0.5), ("p99", 0.99), ("p999", 0.999))
+
+
+def parse_mix(text):
+    """
+    Parses a mix like 'reserve=40,cancel=15' to the weight of each
+    operation, missing operations weigh 0.
+
+    Raises:
+        ValueError: If an operation or weight is not valid.
+    """
+    mix = dict.fromkeys(OPERATIONS, 0.0)
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in mix:
+            raise ValueError(f"unknown operation '{name}', use {OPERATIONS}")
+        mix[name] = float(weight)
+        if mix[name] < 0:
+            raise ValueError(f"negative weight for '{name}'")
+    if not any(mix.values()):
+        raise ValueError("the mix needs a positive weight")
+    return mix
+
+
+def percentile(latencies, fraction):
+    """Nearest rank percentile of sorted latencies."""
+    if not latencies:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(latencies)))
+    return latencies[rank - 1]
+
+
+class LoadThread(threading.Thread):
+    """Runs the operations of one thread with its own system objects."""
+
+    def __init__(self, config, name):
+        super().__init__()
+        self.config = config
+        self.prefix = name
+        self.rng = random.Random(f"{config.seed}-{name}")
+        self.hotel, self.customer, self.reservation = \
+            create_hotel_system(config.backend)
+        self.latencies = {operation: [] for operation in OPERATIONS}
+        self.failures = dict.fromkeys(OPERATIONS, 0)
+        self.active = []
+        self.created = 0
+
+    def random_hotel(self):
+        """ID of one of the hotels of the dataset."""
+        return f"HO_{self.rng.randrange(self.config.hotels)}"
+
+    def random_customer(self):
+        """ID of one of the customers of the dataset."""
+        return f"CT_{self.rng.randrange(self.config.customers)}"
+
+    def operation(self, name):
+        """
+        Runs an operation.
+
+        Returns:
+            (bool): False if the operation was declined, like a booking
+                    of a full hotel.
+        """
+        if name == "reserve":
+            res_id = f"RS_{self.prefix}_{self.created}"
+            self.created += 1
+            if self.reservation.create_reservation(
+                    res_id, self.random_customer(), self.random_hotel()):
+                self.active.append(res_id)
+                return True
+            return False
+        if name == "cancel":
+            res_id = self.active.pop(self.rng.randrange(len(self.active)))
+            return self.reservation.cancel_reservation(res_id)
+        if name == "display":
+            choice = self.rng.random()
+            if choice < 0.5:
+                return bool(self.hotel.display_hotel(self.random_hotel()))
+            if choice < 0.8 or not self.active:
+                return bool(self.customer.display_customer(
+                    self.random_customer()))
+            return bool(self.reservation.display_reservation(
+                self.rng.choice(self.active)))
+        if name == "modify":
+            if self.rng.random() < 0.5:
+                return self.hotel.modify_hotel(
+                    self.random_hotel(), name=f"Hotel {self.rng.random()}")
+            return self.customer.modify_customer(
+                self.random_customer(), name=f"Customer {self.rng.random()}")
+        customer_id = f"CT_{self.prefix}_{self.created}"
+        self.created += 1
+        return self.customer.create_customer(customer_id, "New customer",
+                                             f"{customer_id}@mail.com")
+
+    def run(self):
+        names = list(self.config.mix)
+        weights = list(self.config.mix.values())
+        for _ in range(self.config.operations):
+            name = self.rng.choices(names, weights)[0]
+            if name == "cancel" and not self.active:
+                name = "reserve"
+            start = time.perf_counter()
+            succeeded = self.operation(name)
+            self.latencies[name].append(time.perf_counter() - start)
+            if succeeded is False:
+                self.failures[name] += 1
+
+
+def run_process(config, number):
+    """
+    Runs the threads of one load process in the data folder.
+
+    Returns:
+        (dict): Latencies and failures of each operation, and the number
+                of reservations left active.
+    """
+    os.chdir(config.workdir)
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')
+    threads = [LoadThread(config, f"{number}_{thread}")
+               for thread in range(config.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sys.stdout.close()
+    sys.stdout = sys.__stdout__
+    return {
+        "latencies": {operation: [latency for thread in threads
+                                  for latency in thread.latencies[operation]]
+                      for operation in OPERATIONS},
+        "failures": {operation: sum(thread.failures[operation]
+                                    for thread in threads)
+                     for operation in OPERATIONS},
+        "active": sum(len(thread.active) for thread in threads),
+    }
+
+
+def load_dataset(config):
+    """Creates the hotels and customers the load runs against."""
+    hotel, customer, _ = create_hotel_system(config.backend)
+    hotel.create_hotels_bulk(
+        (f"HO_{number}", f"Hotel {number}", "QRO", config.rooms)
+        for number in range(config.hotels))
+    customer.create_customers_bulk(
+        (f"CT_{number}", f"Customer {number}", f"ct{number}@mail.com")
+        for number in range(config.customers))
+
+
+def check_invariants(config, active):
+    """
+    Checks the free rooms plus the reservations of each hotel equal its
+    capacity, and the reservations saved are the ones left active.
+
+    Returns:
+        (list): Messages describing each violation.
+    """
+    hotel, _, reservation = create_hotel_system(config.backend)
+    reservations = reservation.load_data()
+    booked = {}
+    for record in reservations.values():
+        booked[record["hotel_id"]] = booked.get(record["hotel_id"], 0) + 1
+    violations = []
+    if len(reservations) != active:
+        violations.append(f"{len(reservations)} reservations saved, "
+                          f"{active} left active by the load")
+    for number in range(config.hotels):
+        hotel_id = f"HO_{number}"
+        free = hotel.read_record(hotel_id)["rooms"]
+        if free < 0 or free + booked.get(hotel_id, 0) != config.rooms:
+            violations.append(f"{hotel_id}: {free} free rooms and "
+                              f"{booked.get(hotel_id, 0)} reservations, "
+                              f"capacity {config.rooms}")
+    return violations
+
+
+def summarize(results, seconds):
+    """
+    Combines the results of the processes.
+
+    Returns:
+        (dict): Count, failures, throughput and latency percentiles in
+                milliseconds of each operation, and the totals.
+    """
+    summary = {"seconds": seconds, "operations": {}}
+    total = 0
+    for operation in OPERATIONS:
+        latencies = sorted(latency for result in results
+                           for latency in result["latencies"][operation])
+        if not latencies:
+            continue
+        total += len(latencies)
+        stats = {"count": len(latencies),
+                 "failures": sum(result["failures"][operation]
+                                 for result in results),
+                 "ops_per_second": len(latencies) / seconds}
+        for label, fraction in PERCENTILES:
+            stats[f"{label}_ms"] = percentile(latencies, fraction) * 1000
+        summary["operations"][operation] = stats
+    summary["total"] = total
+    summary["ops_per_second"] = total / seconds
+    return summary
+
+
+def report_lines(summary):
+    """Returns the table of the summary."""
+    lines = [f"{'Operation':<10} | {'Count':>8} | {'Declined':>8} | "
+             f"{'Ops/s':>9} | {'p50 ms':>8} | {'p99 ms':>8} | "
+             f"{'p999 ms':>8}"]
+    lines.append("-" * 79)
+    for operation, stats in summary["operations"].items():
+        lines.append(f"{operation:<10} | {stats['count']:>8} | "
+                     f"{stats['failures']:>8} | "
+                     f"{stats['ops_per_second']:>9.1f} | "
+                     f"{stats['p50_ms']:>8.3f} | {stats['p99_ms']:>8.3f} | "
+                     f"{stats['p999_ms']:>8.3f}")
+    lines.append("-" * 79)
+    lines.append(f"{summary['total']} operations in "
+                 f"{summary['seconds']:.2f}s, "
+                 f"{summary['ops_per_second']:.1f} ops/s")
+    return lines
+
+
+def parse_args(args):
+    """Parses the command line of the load test."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--backend", default="log",
+                        choices=sorted(STORAGE_BACKENDS))
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4,
+                        help="threads of each process")
+    parser.add_argument("--operations", type=int, default=500,
+                        help="operations of each thread")
+    parser.add_argument("--hotels", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=200)
+    parser.add_argument("--rooms", type=int, default=50,
+                        help="capacity of each hotel")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="weight of each operation of "
+                             f"{', '.join(OPERATIONS)}")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--workdir", default=None,
+                        help="folder of the data, a temporary one by "
+                             "default")
+    parser.add_argument("--json", help="file to save the summary")
+    options = parser.parse_args(args)
+    try:
+        options.mix = parse_mix(options.mix)
+    except ValueError as error:
+        parser.error(str(error))
+    if min(options.processes, options.threads, options.operations,
+           options.hotels, options.customers, options.rooms) < 1:
+        parser.error("counts must be positive")
+    return options
+
+
+def main():
+    """Main execution function."""
+    config = parse_args(sys.argv[1:])
+    temporary = config.workdir is None
+    config.workdir = os.path.abspath(
+        tempfile.mkdtemp(prefix="load_test_") if temporary
+        else config.workdir)
+    os.makedirs(config.workdir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(config.workdir)
+    try:
+        load_dataset(config)
+        start = time.perf_counter()
+        with multiprocessing.Pool(config.processes) as pool:
+            results = pool.starmap(run_process,
+                                   [(config, number)
+                                    for number in range(config.processes)])
+        summary = summarize(results, time.perf_counter() - start)
+        violations = check_invariants(
+            config, sum(result["active"] for result in results))
+    finally:
+        os.chdir(cwd)
+        if temporary:
+            shutil.rmtree(config.workdir)
+
+    summary["backend"] = config.backend
+    summary["violations"] = violations
+    print("\n".join(report_lines(summary)))
+    for violation in violations:
+        print(f"Invariant violated: {violation}")
+    if not violations:
+        print("Invariants hold: free rooms plus reservations equal "
+              "capacity in every hotel.")
+    if config.json:
+        with open(config.json, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=4)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
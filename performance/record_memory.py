@@ -0,0 +1,164 @@
+"""
+record_memory.py
+Memory benchmark of the record models of the Hotel System. A seeded
+set of hotels, customers and reservations is saved to the JSON files,
+and the files are loaded into the cache with the plain dictionaries and
+with the slotted records. The memory the cache retains and the peak
+while loading are measured with tracemalloc, and the load time in a
+separate run without it.
+
+Usage:
+    python performance/record_memory.py [--reservations 100000]
+        [--seed 2024] [--json results.json]
+
+@author: Carlos Heinze A01700179
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmark import HOTEL_SYSTEM
+
+sys.path.insert(0, HOTEL_SYSTEM)
+# pylint: disable=wrong-import-position
+from storage_backends import create_hotel_system  # noqa
+
+MODELS = ("json", "slotted")
+
+
+def write_dataset(reservations, seed):
+    """
+    Writes the hotels, customers and reservations files in the current
+    directory, as the JSON storage saves them.
+    """
+    rng = random.Random(seed)
+    hotels = max(1, reservations // 100)
+    customers = max(1, reservations // 10)
+    first_night = date(2025, 1, 1)
+    data = {
+        "hotels.json": {
+            f"HO_{number}": {"name": f"Hotel {number}",
+                             "location": rng.choice(("QRO", "CDMX", "GDL")),
+                             "rooms": rng.randint(10, 200)}
+            for number in range(hotels)},
+        "customers.json": {
+            f"CT_{number}": {"name": f"Customer {number}",
+                             "email": f"customer{number}@mail.com"}
+            for number in range(customers)},
+        "reservations.json": {},
+    }
+    for number in range(reservations):
+        check_in = first_night + timedelta(days=rng.randrange(365))
+        data["reservations.json"][f"RS_{number}"] = {
+            "customer_id": f"CT_{rng.randrange(customers)}",
+            "hotel_id": f"HO_{rng.randrange(hotels)}",
+            "check_in": check_in.isoformat(),
+            "check_out": (check_in + timedelta(
+                days=rng.randint(1, 7))).isoformat()}
+    for filename, records in data.items():
+        with open(filename, 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=4)
+
+
+def cached_system(model):
+    """Returns the Hotel System objects of a model with the cache on."""
+    objects = create_hotel_system(model)
+    for storage in objects:
+        storage.enable_cache()
+    return objects
+
+
+def measure_model(model):
+    """
+    Loads the three files into the cache with a record model.
+
+    Returns:
+        result (dict): Bytes retained by the cache of each class and in
+                       total, the peak over them while loading, and the
+                       seconds the loads took without tracemalloc.
+    """
+    result = {"model": model}
+    objects = cached_system(model)
+    gc.collect()
+    start = time.perf_counter()
+    for storage in objects:
+        storage.load_data()
+    result["load_seconds"] = time.perf_counter() - start
+
+    objects = cached_system(model)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for storage in objects:
+            before = tracemalloc.get_traced_memory()[0]
+            storage.load_data()
+            result[storage.get_filename()] = \
+                tracemalloc.get_traced_memory()[0] - before
+        result["total_bytes"] = sum(result[storage.get_filename()]
+                                    for storage in objects)
+        result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def report_lines(results, reservations):
+    """Returns the table of the results against the plain dictionaries."""
+    baseline = results[0]["total_bytes"]
+    lines = [f"{'Model':<8} | {'Retained KB':>11} | {'Peak KB':>9} | "
+             f"{'B/reservation':>13} | {'Saving':>6} | {'Load s':>7}"]
+    lines.append("-" * 70)
+    for result in results:
+        lines.append(f"{result['model']:<8} | "
+                     f"{result['total_bytes'] // 1024:>11} | "
+                     f"{result['peak_bytes'] // 1024:>9} | "
+                     f"{result['reservations.json'] / reservations:>13.1f}"
+                     f" | {baseline / result['total_bytes']:>5.2f}x | "
+                     f"{result['load_seconds']:>7.3f}")
+    return lines
+
+
+def parse_args(args):
+    """Parses the command line of the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[2])
+    parser.add_argument("--reservations", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--json", help="file to save the results")
+    options = parser.parse_args(args)
+    if options.reservations < 1:
+        parser.error("reservations must be positive")
+    return options
+
+
+def main():
+    """Main execution function."""
+    options = parse_args(sys.argv[1:])
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix="record_memory_")
+    os.chdir(workdir)
+    try:
+        write_dataset(options.reservations, options.seed)
+        results = [measure_model(model) for model in MODELS]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir)
+
+    print("\n".join(report_lines(results, options.reservations)))
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as file:
+            json.dump({"reservations": options.reservations,
+                       "seed": options.seed, "results": results},
+                      file, indent=4)
+
+
+if __name__ == "__main__":
+    main()